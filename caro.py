@@ -12,18 +12,56 @@ import logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+BOARD_SIZE = 19
+WIDTH = BOARD_SIZE + 2          # mỗi hàng có thêm một ô biên ở hai đầu
+BORDER = 3                      # giá trị ô biên: không trùng với X hay O
+CELLS = BOARD_SIZE * BOARD_SIZE
+SYMBOLS = ('', 'X', 'O')        # giá trị một ô trong bytearray -> ký hiệu
+CODES = {'X': 1, 'O': 2}
+STEPS = (1, WIDTH, WIDTH + 1, WIDTH - 1)   # ngang, dọc, chéo xuôi, chéo ngược
+
+def _empty_board():
+    cells = bytearray([BORDER]) * (WIDTH * WIDTH)
+    for row in range(BOARD_SIZE):
+        start = (row + 1) * WIDTH + 1
+        cells[start:start + BOARD_SIZE] = bytes(BOARD_SIZE)
+    return bytes(cells)
+
+EMPTY_BOARD = _empty_board()
+
 class CaroGame:
-    """Logic game Caro 19x19"""
+    """Logic game Caro 19x19
+
+    Bàn cờ là một bytearray 21x21 (0 trống, 1 X, 2 O) có một vòng ô biên
+    bao quanh, ô (row, col) nằm ở vị trí (row + 1) * 21 + col + 1. Nhờ ô
+    biên, kiểm tra thắng chỉ cần đi theo chỉ số mà không phải so giới hạn
+    hàng/cột. move_count cho biết bàn đã đầy hay chưa trong O(1).
+
+    Kiểm tra thắng đi từng ô từ quân vừa đặt: chuỗi thực tế rất ngắn nên
+    nhanh hơn việc cập nhật bảng độ dài chuỗi ở mỗi nước (xem bench_caro.py).
+    Bàn cờ không giữ gì ngoài các ô, nên undo_move chỉ cần xoá ô cuối.
+    """
     def __init__(self):
-        self.board = [['' for _ in range(19)] for _ in range(19)]
+        self.cells = bytearray(EMPTY_BOARD)
+        self.move_count = 0
         self.current_player = 'X'
         self.game_over = False
         self.winner = None
         self.move_history = []
+
+    @property
+    def board(self):
+        """Bàn cờ dạng list of lists '' / 'X' / 'O', chỉ dựng khi cần gửi trạng thái."""
+        return [[SYMBOLS[v] for v in self.cells[i:i + BOARD_SIZE]]
+                for i in range(WIDTH + 1, WIDTH * (BOARD_SIZE + 1), WIDTH)]
         
     def make_move(self, row: int, col: int) -> bool:
-        if 0 <= row < 19 and 0 <= col < 19 and self.board[row][col] == '' and not self.game_over:
-            self.board[row][col] = self.current_player
+        if 0 <= row < BOARD_SIZE and 0 <= col < BOARD_SIZE and not self.game_over:
+            i = (row + 1) * WIDTH + col + 1
+            if self.cells[i]:
+                return False
+            self.cells[i] = CODES[self.current_player]
+            self.move_count += 1
             self.move_history.append((row, col, self.current_player))
             
             if self.check_winner(row, col):
@@ -36,37 +74,42 @@ class CaroGame:
                 self.current_player = 'O' if self.current_player == 'X' else 'X'
             return True
         return False
+
+    def undo_move(self):
+        """Rút lại nước đi cuối cùng; trả về (row, col, player) hoặc None nếu bàn trống."""
+        if not self.move_history:
+            return None
+        row, col, player = self.move_history.pop()
+        self.cells[(row + 1) * WIDTH + col + 1] = 0
+        self.move_count -= 1
+        self.current_player = player
+        self.game_over = False
+        self.winner = None
+        return row, col, player
     
     def check_winner(self, row: int, col: int) -> bool:
-        directions = [(0,1), (1,0), (1,1), (1,-1)]
-        player = self.board[row][col]
-        
-        for dx, dy in directions:
-            count = 1
-            # Kiểm tra một hướng
-            r, c = row + dx, col + dy
-            while 0 <= r < 19 and 0 <= c < 19 and self.board[r][c] == player:
-                count += 1
-                r, c = r + dx, c + dy
-            
-            # Kiểm tra hướng ngược lại
-            r, c = row - dx, col - dy
-            while 0 <= r < 19 and 0 <= c < 19 and self.board[r][c] == player:
-                count += 1
-                r, c = r - dx, c - dy
-                
-            if count >= 5:
+        cells = self.cells
+        at = (row + 1) * WIDTH + col + 1
+        player = cells[at]
+        
+        for step in STEPS:
+            # Đếm về hai phía; ô biên luôn khác người chơi nên vòng lặp tự dừng ở mép bàn
+            i = at + step
+            while cells[i] == player:
+                i += step
+            j = at - step
+            while cells[j] == player:
+                j -= step
+            if (i - j) // step - 1 >= 5:
                 return True
         return False
     
     def is_board_full(self) -> bool:
-        for row in self.board:
-            if '' in row:
-                return False
-        return True
+        return self.move_count == CELLS
     
     def reset(self):
-        self.board = [['' for _ in range(19)] for _ in range(19)]
+        self.cells[:] = EMPTY_BOARD  # ghi đè tại chỗ, không cấp phát lại bàn cờ
+        self.move_count = 0
         self.current_player = 'X'
         self.game_over = False
         self.winner = None
@@ -79,6 +122,9 @@ class CaroConnectionManager:
         self.game = CaroGame()
         self.player_assignments: Dict[str, str] = {}  # client_id -> 'X' or 'O'
         self.spectators: Set[str] = set()
+        # Tăng sau mỗi thay đổi bàn cờ (nước đi, reset) và không bao giờ quay về 0,
+        # để client nhận ra mình đã lỡ một cập nhật và xin lại trạng thái đầy đủ
+        self.seq = 0
 
     async def connect(self, websocket: WebSocket, client_id: str):
         await websocket.accept()
@@ -133,8 +179,25 @@ class CaroConnectionManager:
             self.players[client_id] = {'username': username, 'symbol': 'spectator'}
             return 'spectator'
 
+    def next_seq(self) -> int:
+        self.seq += 1
+        return self.seq
+
+    def move_delta(self, row: int, col: int, player: str, message: str) -> dict:
+        """Gói move_made: chỉ nước vừa đi và số thứ tự, không gửi lại cả bàn cờ"""
+        return {
+            'type': 'move_made',
+            'seq': self.next_seq(),
+            'move': [row, col, player],
+            'current_player': self.game.current_player,
+            'game_over': self.game.game_over,
+            'winner': self.game.winner,
+            'message': message
+        }
+
     def get_game_state(self):
         return {
+            'seq': self.seq,
             'board': self.game.board,
             'current_player': self.game.current_player,
             'game_over': self.game.game_over,
@@ -488,6 +551,7 @@ def add_caro_routes(app: FastAPI):
                 this.playerSymbol = null;
                 this.isConnected = false;
                 this.gameState = null;
+                this.syncing = false;
                 
                 this.initElements();
                 this.createBoard();
@@ -628,20 +692,19 @@ def add_caro_routes(app: FastAPI):
                         
                     case 'game_state':
                         this.gameState = data.state;
+                        this.syncing = false;
                         this.updateBoard();
                         this.updatePlayersList();
                         this.updateGameStatus();
                         break;
                         
                     case 'move_made':
-                        this.gameState = data.state;
-                        this.updateBoard();
-                        this.updateGameStatus();
-                        this.addChatMessage('game', data.message);
+                        this.applyMove(data);
                         break;
                         
                     case 'game_reset':
                         this.gameState = data.state;
+                        this.syncing = false;
                         this.updateBoard();
                         this.updateGameStatus();
                         this.addChatMessage('system', 'Game đã được reset!');
@@ -657,6 +720,41 @@ def add_caro_routes(app: FastAPI):
                 }
             }
             
+            applyMove(data) {
+                // move_made chỉ mang nước vừa đi; hụt số thứ tự thì xin lại cả bàn
+                if (!this.gameState || data.seq > this.gameState.seq + 1) {
+                    this.requestSync();
+                    return;
+                }
+                if (data.seq <= this.gameState.seq) return;  // cũ hơn trạng thái đang có
+                
+                const [row, col, player] = data.move;
+                const state = this.gameState;
+                state.seq = data.seq;
+                state.board[row][col] = player;
+                state.current_player = data.current_player;
+                state.game_over = data.game_over;
+                state.winner = data.winner;
+                state.move_history.push(data.move);
+                this.updateCell(row, col);
+                this.updateGameStatus();
+                this.addChatMessage('game', data.message);
+            }
+            
+            requestSync() {
+                // Chỉ xin một lần cho tới khi game_state về
+                if (this.syncing) return;
+                this.syncing = true;
+                this.sendMessage({ type: 'sync' });
+            }
+            
+            updateCell(row, col) {
+                const value = this.gameState.board[row][col];
+                const cell = this.boardEl.children[row * 19 + col];
+                cell.textContent = value || '';
+                cell.className = 'cell' + (value ? ' ' + value.toLowerCase() : '');
+            }
+            
             updateBoard() {
                 if (!this.gameState) return;
                 
@@ -805,14 +903,19 @@ def add_caro_routes(app: FastAPI):
                                     else:
                                         move_msg += f' - {username} thắng!'
                                 
-                                await caro_manager.broadcast({
-                                    'type': 'move_made',
-                                    'state': caro_manager.get_game_state(),
-                                    'message': move_msg
-                                })
+                                await caro_manager.broadcast(
+                                    caro_manager.move_delta(row, col, player_symbol, move_msg))
                 
+                elif message_type == 'sync':
+                    # Client thấy hụt số thứ tự: gửi lại trạng thái đầy đủ cho riêng nó
+                    await caro_manager.send_personal_message({
+                        'type': 'game_state',
+                        'state': caro_manager.get_game_state()
+                    }, client_id)
+
                 elif message_type == 'reset':
                     caro_manager.game.reset()
+                    caro_manager.next_seq()
                     await caro_manager.broadcast({
                         'type': 'game_reset',
                         'state': caro_manager.get_game_state()
@@ -841,6 +944,7 @@ def add_caro_routes(app: FastAPI):
             # Reset game nếu một trong hai người chơi chính rời đi
             if len(caro_manager.player_assignments) < 2:
                 caro_manager.game.reset()
+                caro_manager.next_seq()
                 await caro_manager.broadcast({
                     'type': 'game_reset',
                     'state': caro_manager.get_game_state()
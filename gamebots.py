@@ -0,0 +1,111 @@
+"""Built-in bot opponents for RpsServer.
+
+A bot is just another seat in a Match: no socket, no thread, no task.
+The server asks it for a move the moment a round opens and shows it the
+round_result packet through `deliver`, so thousands of bot seats cost
+only their small per-bot state.
+"""
+import itertools, random
+from gamematch import MOVES
+
+BOT_WAIT = 10.0   # seconds a lone player waits before a bot takes the empty seat; 0 disables
+COUNTER = {"rock": "paper", "paper": "scissors", "scissors": "rock"}  # the move that beats each move
+
+# Strategies -------------------------------------------------------
+class RandomStrategy:
+    name = "random"
+    __slots__ = ()
+
+    def choose(self):
+        return random.choice(MOVES)
+
+    def observe(self, moves):
+        pass
+
+class FrequencyStrategy:
+    """Counters the move opponents have played most often."""
+    name = "frequency"
+    __slots__ = ("counts",)
+
+    def __init__(self):
+        self.counts = dict.fromkeys(MOVES, 0)
+
+    def choose(self):
+        top = max(self.counts, key=self.counts.get)
+        if not self.counts[top]:
+            return random.choice(MOVES)
+        return COUNTER[top]
+
+    def observe(self, moves):
+        for m in moves:
+            self.counts[m] += 1
+
+class MarkovStrategy:
+    """Predicts the next opponent move from the one before it (first-order chain)."""
+    name = "markov"
+    __slots__ = ("table", "last")
+
+    def __init__(self):
+        self.table = {m: dict.fromkeys(MOVES, 0) for m in MOVES}
+        self.last = None
+
+    def choose(self):
+        if self.last is None:
+            return random.choice(MOVES)
+        following = self.table[self.last]
+        guess = max(following, key=following.get)
+        if not following[guess]:
+            return random.choice(MOVES)
+        return COUNTER[guess]
+
+    def observe(self, moves):
+        if not moves:
+            return
+        move = max(set(moves), key=moves.count)  # several opponents: follow the most played move
+        if self.last is not None:
+            self.table[self.last][move] += 1
+        self.last = move
+
+STRATEGIES = {s.name: s for s in (RandomStrategy, FrequencyStrategy, MarkovStrategy)}
+
+# Seats ------------------------------------------------------------
+class BotPlayer:
+    """Stands in for PlayerConn inside a match."""
+    __slots__ = ("name", "strategy", "move", "score", "match", "proto", "active")
+    is_bot = True
+    away = False
+
+    def __init__(self, strategy):
+        self.name = f"{strategy.name.capitalize()}Bot"  # one leaderboard entry per strategy
+        self.strategy = strategy
+        self.move = None
+        self.score = 0
+        self.match = None
+        self.proto = None
+        self.active = True
+
+    def choose(self):
+        return self.strategy.choose()
+
+    def deliver(self, obj):
+        """Packets the server would have sent over a socket."""
+        if obj.get("type") == "round_result" and self.match is not None:
+            self.strategy.observe([p.move for p in self.match.players if p is not self and p.move is not None])
+
+class BotPool:
+    """Hands out bot seats, cycling through the configured strategies."""
+    def __init__(self, names=tuple(STRATEGIES)):
+        unknown = [n for n in names if n not in STRATEGIES]
+        if unknown:
+            raise ValueError(f"unknown bot strategy: {', '.join(unknown)}")
+        self.next_strategy = itertools.cycle([STRATEGIES[n] for n in names])
+        self.active = 0
+
+    def take(self):
+        self.active += 1
+        return BotPlayer(next(self.next_strategy)())
+
+    def release(self, bot):
+        if bot.active:
+            bot.active = False
+            self.active -= 1
@@ -1,30 +1,17 @@
 import tkinter as tk
 from tkinter import messagebox
-import socket, threading, json, sys
+import asyncio, threading, sys, queue
+from gameproto import MOVE_NAMES, LETTER_CODES
+from gamecore import RpsClient, round_outcome, CONNECT_TIMEOUT
 
 SERVER_HOST_DEFAULT = "localhost"
 SERVER_PORT_DEFAULT = 12345
-
-# ---- Networking helpers ----
-def send_json(sock, obj):
-    try:
-        sock.sendall(json.dumps(obj, separators=(",", ":")).encode("utf-8") + b"\n")
-    except Exception:
-        raise
-
-def recv_json_line(sock):
-    buff = b""
-    while True:
-        chunk = sock.recv(1)
-        if not chunk:
-            return None
-        if chunk == b"\n":
-            break
-        buff += chunk
-    try:
-        return json.loads(buff.decode("utf-8"))
-    except Exception:
-        return None
+DRAIN_MS = 30  # how often the Tk loop applies queued server messages
+# Only the newest of these in one drained batch is rendered; older ones are stale state.
+# "players" is never dropped: a round_result is read against the seat order it set.
+COALESCE = {"start_round", "round_result", "error", "rtt"}
+RESULT_MS = 2500  # how long the result panel stays up
+OUTCOME_TEXT = {"win": ("Win ✅", "#27ae60"), "tie": ("Tie 🤝", "#f39c12"), "lose": ("Lose ❌", "#e74c3c")}
 
 # ---- Styled button ----
 class ModernButton(tk.Button):
@@ -43,17 +30,27 @@ class RpsClientGUI:
         self.root.title("RPS Client")
         self.root.geometry("640x480")
         self.root.configure(bg="#1a1a2e")
-        self.sock = None
+        self.client = None   # gamecore.RpsClient, driven by the network thread's event loop
+        self.loop = None
+        self.task = None     # the session coroutine; cancelling it aborts a pending connect
         self.player_name = ""
         self.state = "menu"
         self.move_buttons = {}
         self.status_var = tk.StringVar(value="Idle")
         self.score_var = tk.StringVar(value="Score: -")
         self.round_var = tk.StringVar(value="Round: -")
+        self.rtt_var = tk.StringVar(value="RTT: -")
         self.opponent_name = None
+        self.players = []  # seat order of the match; round_result lists moves and scores in it
+        self.seat = 0      # our index in players, sent by the server
+        self.binary_var = tk.BooleanVar(value=True)
+        self.fast_var = tk.BooleanVar(value=False)  # results inline, no panel
+        self.hide_job = None
         self.build_menu()
         self.listener_thread = None
         self.pending_move = None
+        # The network thread only fills this; Tk is touched from drain() on the main loop
+        self.inbox = queue.SimpleQueue()
 
     # UI builders -------------------------------------------------
     def clear(self):
@@ -80,11 +77,23 @@ class RpsClientGUI:
         self.port_entry = tk.Entry(frm, width=22)
         self.port_entry.insert(0, str(SERVER_PORT_DEFAULT))
         self.port_entry.grid(row=2, column=1, pady=4)
-        ModernButton(self.root, "Connect", self.connect, "#27ae60", "#2ecc71").pack(pady=20)
+        tk.Label(frm, text="Timeout (s):", fg="white", bg="#1a1a2e").grid(row=3, column=0, sticky="e", padx=4, pady=4)
+        self.timeout_entry = tk.Entry(frm, width=22)
+        self.timeout_entry.insert(0, f"{CONNECT_TIMEOUT:g}")
+        self.timeout_entry.grid(row=3, column=1, pady=4)
+        tk.Checkbutton(frm, text="Compact binary protocol", variable=self.binary_var,
+                       fg="white", bg="#1a1a2e", selectcolor="#2d2d44",
+                       activebackground="#1a1a2e").grid(row=4, column=1, sticky="w", pady=4)
+        tk.Checkbutton(frm, text="Fast mode (results inline)", variable=self.fast_var,
+                       fg="white", bg="#1a1a2e", selectcolor="#2d2d44",
+                       activebackground="#1a1a2e").grid(row=5, column=1, sticky="w", pady=4)
+        self.connect_btn = ModernButton(self.root, "Connect", self.connect, "#27ae60", "#2ecc71")
+        self.connect_btn.pack(pady=20)
         tk.Label(self.root, textvariable=self.status_var, fg="#aaaaaa", bg="#1a1a2e").pack(pady=8)
 
     def build_game(self):
         self.clear()
+        self.state = "game"
         top = tk.Frame(self.root, bg="#2d2d44", height=70)
         top.pack(fill="x")
         top.pack_propagate(False)
@@ -94,6 +103,7 @@ class RpsClientGUI:
         tk.Label(top, text="Opponent: ", fg="#e74c3c", bg="#2d2d44", font=("Arial", 12)).pack(side="left", padx=(40, 4))
         self.opp_label = tk.Label(top, text="...", fg="#e74c3c", bg="#2d2d44", font=("Arial", 12, "bold"))
         self.opp_label.pack(side="left")
+        tk.Label(top, textvariable=self.rtt_var, fg="#95a5a6", bg="#2d2d44", font=("Arial", 10)).pack(side="right", padx=12)
 
         center = tk.Frame(self.root, bg="#1a1a2e")
         center.pack(expand=True)
@@ -112,9 +122,28 @@ class RpsClientGUI:
             btn.pack(side="left", padx=10, ipadx=14, ipady=10)
             self.move_buttons[mv] = btn
 
-        ModernButton(self.root, "Quit", self.quit_game, "#34495e", "#566573").pack(pady=15)
+        # Fast mode: one line under the buttons, rewritten every round
+        self.inline_result = tk.Label(center, text="", font=("Arial", 13, "bold"), fg="white", bg="#1a1a2e")
+        self.inline_result.pack(pady=8)
+
+        ModernButton(self.root, "Quit", self.quit_game, "#34495e", "#566573").pack(pady=(15, 4))
+        tk.Label(self.root, textvariable=self.status_var, fg="#aaaaaa", bg="#1a1a2e").pack(pady=4)
+        self.build_result_panel()
         self.disable_moves()
 
+    def build_result_panel(self):
+        """Created once per game screen; show_result only rewrites its labels."""
+        self.result_panel = tk.Frame(self.root, bg="#2d2d44", padx=24, pady=10, cursor="hand2")
+        self.result_outcome = tk.Label(self.result_panel, font=("Arial", 20, "bold"), bg="#2d2d44")
+        self.result_detail = tk.Label(self.result_panel, fg="white", bg="#2d2d44", font=("Arial", 14))
+        self.result_score = tk.Label(self.result_panel, fg="#aaaaaa", bg="#2d2d44")
+        for w in (self.result_panel, self.result_outcome, self.result_detail, self.result_score):
+            w.bind("<Button-1>", lambda e: self.hide_result())
+        self.result_outcome.pack()
+        self.result_detail.pack(pady=4)
+        self.result_score.pack()
+        self.hide_job = None
+
     # Networking --------------------------------------------------
     def connect(self):
         name = self.name_entry.get().strip()
@@ -127,42 +156,125 @@ class RpsClientGUI:
         except ValueError:
             messagebox.showerror("Error", "Invalid port")
             return
-        self.player_name = name
-        self.status_var.set("Connecting...")
         try:
-            self.sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-            self.sock.connect((host, port))
-        except Exception as e:
-            messagebox.showerror("Connection Failed", str(e))
+            timeout = float(self.timeout_entry.get().strip() or CONNECT_TIMEOUT)
+        except ValueError:
+            messagebox.showerror("Error", "Invalid timeout")
             return
-        # Send join
-        send_json(self.sock, {"type": "join", "data": {"name": self.player_name}})
-        self.build_game()
-        self.listener_thread = threading.Thread(target=self.listen_loop, daemon=True)
+        self.player_name = name
+        self.status_var.set(f"Connecting to {host}:{port}...")
+        self.connect_btn.config(text="Cancel", command=self.cancel_connect)
+        self.client = RpsClient(name, "binary" if self.binary_var.get() else "json", connect_timeout=timeout)
+        # DNS and the TCP handshake happen on the network thread; the window stays live
+        self.loop = asyncio.new_event_loop()
+        self.task = self.loop.create_task(self.session(host, port))
+        self.listener_thread = threading.Thread(target=self.run_network, args=(self.loop, self.task), daemon=True)
         self.listener_thread.start()
 
-    def listen_loop(self):
+    def run_network(self, loop, task):
+        try:
+            loop.run_until_complete(task)
+        except asyncio.CancelledError:
+            pass
+        finally:
+            loop.close()
+
+    def cancel_connect(self):
+        self.call(self.task.cancel)
+
+    async def session(self, host, port):
+        """Runs on the network thread: never touches Tk, only queues events for drain()."""
+        try:
+            await self.client.connect(host, port)
+            await self.client.join()
+        except OSError as e:
+            self.client.close()
+            self.inbox.put({"type": "connect_failed", "data": {"message": str(e)}})
+            return
+        except asyncio.CancelledError:
+            self.client.close()
+            self.inbox.put({"type": "connect_failed", "data": {"message": "Cancelled"}})
+            return
+        try:
+            async for event in self.client:   # pings are answered inside RpsClient
+                self.inbox.put(event)
+        finally:
+            self.client.close()
+            self.inbox.put(None)  # disconnected
+
+    def call(self, fn, *args):
+        """Run an RpsClient command on the network thread; a no-op once the session has ended."""
+        # The loop closes as soon as session() returns, which can be a drain tick
+        # before the UI hears about it (e.g. Cancel clicked just as the connect failed)
+        if self.loop and not self.loop.is_closed():
+            try:
+                self.loop.call_soon_threadsafe(fn, *args)
+            except RuntimeError:
+                pass  # closed between the check and the call
+
+    def drain(self):
+        """Apply everything queued since the last tick, rendering only the latest state."""
+        batch = []
         try:
             while True:
-                msg = recv_json_line(self.sock)
-                if msg is None:
-                    self.on_disconnect()
-                    break
-                self.handle_message(msg)
-        except Exception:
-            self.on_disconnect()
+                batch.append(self.inbox.get_nowait())
+        except queue.Empty:
+            pass
+        last = {}
+        for i, msg in enumerate(batch):
+            if msg is not None and msg.get("type") in COALESCE:
+                last[msg["type"]] = i
+        try:
+            for i, msg in enumerate(batch):
+                try:
+                    if msg is None:
+                        self.on_disconnect()
+                    elif last.get(msg.get("type"), i) == i:
+                        self.handle_message(msg)
+                except Exception:
+                    # Report it the way Tk would, and still apply the rest of the batch
+                    self.root.report_callback_exception(*sys.exc_info())
+        finally:
+            self.root.after(DRAIN_MS, self.drain)
 
     def handle_message(self, msg):
         t = msg.get("type")
         data = msg.get("data", {})
-        if t == "join_ack":
-            self.status_var.set("Joined server. Waiting for players...")
+        if t == "connect_failed":
+            self.connect_btn.config(text="Connect", command=self.connect)
+            if data.get("message") == "Cancelled":
+                self.status_var.set("Cancelled")
+            else:
+                self.status_var.set("Connection failed")
+                messagebox.showerror("Connection Failed", data.get("message", ""))
+        elif t == "join_ack":
+            if self.state == "menu":
+                self.build_game()
+            if data.get("resumed"):
+                self.status_var.set("Reconnected")
+                self.round_var.set(f"Round: {data.get('round')}")
+            else:
+                self.status_var.set("Joined server. Waiting for players...")
+        elif t == "connection_lost":
+            self.disable_moves()
+            self.prompt_label.config(text="Connection lost. Reconnecting...")
+            self.status_var.set("Reconnecting...")
+        elif t == "reconnecting":
+            self.status_var.set(f"Reconnect attempt {data['attempt']} of {data['retries']} failed, retrying...")
+        elif t == "player_away":
+            self.status_var.set(f"{data.get('name')} lost connection, waiting up to {data.get('grace', 0):g}s")
+        elif t == "player_back":
+            self.status_var.set(f"{data.get('name')} is back")
+        elif t == "rtt":
+            self.rtt_var.set(f"RTT: {data['rtt'] * 1000:.0f} ms")
         elif t == "players":
             players = data.get("players", [])
-            # Opponent name (any other)
-            opp = [p for p in players if p != self.player_name]
-            self.opponent_name = opp[0] if opp else None
-            self.opp_label.config(text=self.opponent_name or "Waiting...")
+            self.players = players
+            self.seat = data.get("seat", 0)  # from the server: two players may share a name
+            # Opponent name (any other), or the size of the room
+            opp = [p for i, p in enumerate(players) if i != self.seat]
+            self.opponent_name = opp[0] if len(opp) == 1 else None
+            self.opp_label.config(text=self.opponent_name or (f"{len(opp)} players" if opp else "Waiting..."))
         elif t == "start_round":
             self.round_var.set(f"Round: {data.get('round')}")
             self.prompt_label.config(text=data.get("message", "Your move"))
@@ -188,31 +300,40 @@ class RpsClientGUI:
         self.pending_move = move
         self.disable_moves()
         self.prompt_label.config(text=f"You picked {move.upper()}. Waiting...")
-        try:
-            send_json(self.sock, {"type": "move", "data": {"move": move}})
-        except Exception:
-            self.on_disconnect()
+        self.call(self.client.play, move)
 
     def show_result(self, data):
-        p1 = data["p1"]
-        p2 = data["p2"]
-        you = p1 if p1["name"] == self.player_name else p2
-        opp = p2 if you is p1 else p1
-        outcome = "Win ✅" if data["winner"] == self.player_name else ("Tie 🤝" if data["winner"] is None else "Lose ❌")
-        self.score_var.set(f"Score: {p1['name']} {p1['score']} - {p2['name']} {p2['score']}")
-        # Popup
-        popup = tk.Toplevel(self.root)
-        popup.title("Round Result")
-        popup.geometry("320x240")
-        popup.configure(bg="#1a1a2e")
-        tk.Label(popup, text=outcome, font=("Arial", 20, "bold"),
-                 fg=("#27ae60" if "Win" in outcome else "#f39c12" if "Tie" in outcome else "#e74c3c"),
-                 bg="#1a1a2e").pack(pady=16)
-        tk.Label(popup, text=f"You: {you['move'].upper()}\nOpponent: {opp['move'].upper()}",
-                 fg="white", bg="#1a1a2e", font=("Arial", 14)).pack(pady=8)
-        tk.Label(popup, text=self.score_var.get(), fg="#aaaaaa", bg="#1a1a2e").pack(pady=8)
-        ModernButton(popup, "OK", popup.destroy, "#3498db", "#5dade2").pack(pady=10)
-        popup.after(2500, popup.destroy)
+        moves, scores, counts = data["moves"], data["scores"], data["counts"]
+        seat = self.seat
+        move_at = lambda i: MOVE_NAMES[LETTER_CODES[moves[i]]]
+        mine, result = round_outcome(data, seat)
+        outcome, color = OUTCOME_TEXT.get(result, OUTCOME_TEXT["lose"])
+        if len(moves) == 2:
+            opp = 1 - seat
+            self.score_var.set(f"Score: {self.players[0]} {scores[0]} - {self.players[1]} {scores[1]}")
+            field = f"Opponent: {(move_at(opp) or 'timeout').upper()}"
+        else:
+            rank = 1 + sum(1 for s in scores if s > scores[seat])
+            self.score_var.set(f"Score: {scores[seat]} (#{rank} of {len(scores)})")
+            field = " · ".join(f"{counts[m]} {m}" for m in ("rock", "paper", "scissors") if counts[m])
+        detail = f"You: {(mine or 'timeout').upper()}"
+        if self.fast_var.get():
+            self.inline_result.config(text=f"{outcome}  {detail} · {field}", fg=color)
+            return
+        self.result_outcome.config(text=outcome, fg=color)
+        self.result_detail.config(text=f"{detail}\n{field}")
+        self.result_score.config(text=self.score_var.get())
+        self.result_panel.place(relx=0.5, rely=1.0, y=-70, anchor="s")
+        self.result_panel.lift()
+        if self.hide_job:
+            self.root.after_cancel(self.hide_job)
+        self.hide_job = self.root.after(RESULT_MS, self.hide_result)
+
+    def hide_result(self):
+        if self.hide_job:
+            self.root.after_cancel(self.hide_job)
+            self.hide_job = None
+        self.result_panel.place_forget()
 
     # UI helpers --------------------------------------------------
     def enable_moves(self):
@@ -232,16 +353,16 @@ class RpsClientGUI:
             pass
 
     def quit_game(self):
-        try:
-            if self.sock:
-                send_json(self.sock, {"type": "quit"})
-                self.sock.close()
-        except:
-            pass
+        if self.loop and self.loop.is_running():
+            try:
+                asyncio.run_coroutine_threadsafe(self.client.quit(), self.loop).result(1)
+            except Exception:
+                pass
         self.root.destroy()
 
     def run(self):
         self.root.protocol("WM_DELETE_WINDOW", self.quit_game)
+        self.root.after(DRAIN_MS, self.drain)
         self.root.mainloop()
 
 if __name__ == "__main__":
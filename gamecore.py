@@ -0,0 +1,245 @@
+"""Headless asyncio client for RpsServer.
+
+RpsClient is one player: the socket, the framing and the protocol state
+machine that used to live inside RpsClientGUI.handle_message, with no
+UI and no threads. Reading is driven by whoever iterates the client, so
+an idle client is just its buffers and thousands fit in one event loop.
+
+If the link drops mid-game the client reconnects on its own, with
+exponential backoff, and rejoins with the resume token from join_ack;
+the server gives back the same seat and score if it is still held.
+While connected it pings the server every few seconds and reports the
+round-trip time as "rtt" events (and to the server, in the next ping).
+
+    client = RpsClient("alice", proto="binary")
+    await client.connect("localhost", 12345)
+    await client.join()
+    async for event in client:
+        if event["type"] == "start_round":
+            client.play("rock")
+"""
+import asyncio, collections, random
+from gameproto import FrameReader, FrameTooLarge, encode_frame, MOVE_NAMES, LETTER_CODES, RECV_CHUNK
+from gamematch import MOVES
+
+# Client states
+IDLE, JOINING, WAITING, CHOOSING, MOVED, RECONNECTING, CLOSED = (
+    "idle", "joining", "waiting", "choosing", "moved", "reconnecting", "closed")
+
+RETRY_FIRST = 0.5    # seconds before the first reconnect attempt, doubled after each failure
+RETRY_MAX = 8.0
+RETRIES = 8          # attempts before giving up; together they outlast the server's 30s grace
+CONNECT_TIMEOUT = 5.0
+PING_EVERY = 5.0     # seconds between RTT pings; 0 disables
+
+def round_outcome(data, seat):
+    """(move, win/tie/lose) of `seat` in a round_result; the move is None if it timed out."""
+    move = MOVE_NAMES[LETTER_CODES[data["moves"][seat]]]
+    return move, data["outcomes"].get(move or "none", "tie")
+
+class RpsClient:
+    def __init__(self, name, proto="json", retries=RETRIES, connect_timeout=CONNECT_TIMEOUT,
+                 ping_every=PING_EVERY):
+        self.name = name
+        self.wanted_proto = proto
+        self.retries = retries   # reconnect attempts after a lost link; 0 = just close
+        self.connect_timeout = connect_timeout
+        self.ping_every = ping_every
+        self.ping_handle = None  # loop.call_later handle, so pings cost no task
+        self.rtt = None          # last measured round trip, seconds
+        self.host = self.port = None
+        self.token = None        # resume token from join_ack
+        self.attempt = 0
+        self.proto = "json"      # what the server confirmed in join_ack
+        self.state = IDLE
+        self.players = []        # seat order of the match; round_result lists moves and scores in it
+        self.seat = 0            # our index in `players`, as the server told us
+        self.match = None
+        self.round = None
+        self.move = None         # what we played this round
+        self.scores = []
+        self.reader = self.writer = None
+        self.frames = FrameReader()
+        self.pending = collections.deque()   # events read but not yet handed out
+        self.refused = None      # error message the server answered join with
+
+    # Commands ------------------------------------------------------
+    async def connect(self, host, port):
+        """Resolve and connect, giving up after connect_timeout; cancel the awaiting task to abort."""
+        self.host, self.port = host, port
+        self.frames = FrameReader()
+        self.proto = "json"
+        try:
+            self.reader, self.writer = await asyncio.wait_for(
+                asyncio.open_connection(host, port), self.connect_timeout or None)
+        except asyncio.TimeoutError:
+            raise TimeoutError(f"no answer from {host}:{port} within {self.connect_timeout:g}s") from None
+
+    async def join(self):
+        """Send join and wait for join_ack; events read meanwhile stay queued."""
+        join = {"name": self.name}
+        if self.wanted_proto != "json":
+            join["proto"] = self.wanted_proto
+        if self.token:
+            join["resume"] = self.token
+        self.state = JOINING
+        self.refused = None
+        self.send({"type": "join", "data": join})  # always JSON, the binary format starts after join_ack
+        while self.state == JOINING:
+            if not await self.read() or self.refused:
+                self.close()
+                raise ConnectionError(self.refused or "closed before join_ack")
+        return self.proto
+
+    def play(self, move):
+        """Submit a move for the open round; False if no round is waiting for one."""
+        if self.state != CHOOSING or move not in MOVES:
+            return False
+        self.move = move
+        self.state = MOVED
+        self.send({"type": "move", "data": {"move": move}})
+        return True
+
+    async def quit(self):
+        """Tell the server we are leaving and wait for the socket to flush and close."""
+        if self.state == RECONNECTING:
+            self.close()
+        elif self.writer and self.state != CLOSED:
+            self.send({"type": "quit"})
+            self.close()
+            try:
+                await self.writer.wait_closed()
+            except OSError:
+                pass
+
+    def close(self):
+        self.state = CLOSED
+        self.stop_pings()
+        if self.writer:
+            self.writer.close()
+
+    def send(self, obj):
+        self.writer.write(encode_frame(obj, self.proto))
+
+    # Round-trip time -----------------------------------------------
+    def ping(self):
+        """Send one RTT ping (carrying the last measurement) and schedule the next."""
+        loop = asyncio.get_running_loop()
+        data = {"t": loop.time()}
+        if self.rtt is not None:
+            data["rtt"] = round(self.rtt * 1000, 1)
+        self.send({"type": "ping", "data": data})
+        self.ping_handle = loop.call_later(self.ping_every, self.ping)
+
+    def stop_pings(self):
+        if self.ping_handle is not None:
+            self.ping_handle.cancel()
+            self.ping_handle = None
+
+    # Events --------------------------------------------------------
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        while not self.pending:
+            if not await self.read():
+                raise StopAsyncIteration
+        return self.pending.popleft()
+
+    async def read(self):
+        """One read() worth of frames into `pending`; False once the connection is gone."""
+        if self.state == CLOSED:
+            return False
+        if self.state == RECONNECTING:
+            return await self.reconnect()
+        try:
+            data = await self.reader.read(RECV_CHUNK)
+            msgs = self.frames.feed(data) if data else None
+        except (OSError, FrameTooLarge):
+            msgs = None
+        if msgs is None:
+            if self.token and self.retries and self.state != JOINING:
+                self.stop_pings()
+                self.writer.close()
+                self.state = RECONNECTING
+                self.attempt = 0
+                self.pending.append({"type": "connection_lost", "data": {"retries": self.retries}})
+                return True
+            self.close()
+            return False
+        for msg in msgs:
+            event = self.handle(msg)
+            if event is not None:
+                self.pending.append(event)
+        return True
+
+    async def reconnect(self):
+        """One reconnect attempt after a backoff delay; False once out of attempts."""
+        if self.attempt >= self.retries:
+            self.close()
+            return False
+        delay = min(RETRY_MAX, RETRY_FIRST * 2 ** self.attempt)
+        self.attempt += 1
+        # Jitter, so clients cut off together don't all come back in the same tick
+        await asyncio.sleep(delay * random.uniform(0.5, 1.0))
+        try:
+            await self.connect(self.host, self.port)
+            await self.join()
+        except OSError as e:
+            if self.writer:
+                self.writer.close()
+            self.state = RECONNECTING
+            self.pending.append({"type": "reconnecting", "data": {
+                "attempt": self.attempt, "retries": self.retries, "error": str(e)}})
+        return True
+
+    def handle(self, msg):
+        """Apply one server message to the state; returns the event to hand out, or None."""
+        if msg is None:
+            return {"type": "error", "data": {"message": "undecodable frame"}}
+        t = msg.get("type")
+        data = msg.get("data") or {}
+        if t == "join_ack":
+            self.proto = data.get("proto", "json")
+            self.token = data.get("resume")
+            self.state = WAITING
+            if self.ping_every and self.ping_handle is None:
+                self.ping_handle = asyncio.get_running_loop().call_later(self.ping_every, self.ping)
+            if data.get("resumed"):
+                self.match, self.round = data.get("match"), data.get("round")
+                self.scores = data.get("scores", [])
+            else:
+                self.players, self.scores, self.match, self.round = [], [], None, None
+        elif t == "players":
+            self.players = data.get("players", [])
+            self.seat = data.get("seat", 0)
+        elif t == "start_round":
+            self.match = data.get("match")
+            self.round = data.get("round")
+            self.move = None
+            self.state = CHOOSING
+        elif t == "round_result":
+            self.scores = data.get("scores", [])
+            self.state = WAITING
+        elif t == "opponent_left":
+            self.state = WAITING
+        elif t == "error" and self.state == JOINING:
+            self.refused = data.get("message", "join refused")
+        elif t == "ping":
+            # Answered here, never handed out: keeps the server from dropping an idle client
+            self.send({"type": "pong", "data": data})
+            return None
+        elif t == "pong":
+            if "t" not in data:
+                return None
+            self.rtt = asyncio.get_running_loop().time() - data["t"]
+            return {"type": "rtt", "data": {"rtt": self.rtt}}
+        return msg
+
+    # Helpers -------------------------------------------------------
+    @property
+    def opponents(self):
+        return [p for i, p in enumerate(self.players) if i != self.seat]
+
+    def outcome(self, data):
+        return round_outcome(data, self.seat)
@@ -0,0 +1,60 @@
+"""Admission control for RpsServer.
+
+Connections are counted globally and per client IP at accept time, before
+any thread, reader or outbox exists, so a connect burst is turned away
+for the price of one send(). Once admitted, each connection gets a token
+bucket that caps how many messages per second it may have handled.
+"""
+import threading, time
+
+BACKLOG = 128          # listen() queue length
+MAX_CONNECTIONS = 10000  # open connections per threaded server process (a thread each); 0 = unlimited
+MAX_PER_IP = 32        # open connections from one address; 0 = unlimited
+MSG_RATE = 20.0        # messages per second refilled into each bucket; 0 = unlimited
+MSG_BURST = 40         # bucket size: messages accepted back to back
+
+class TokenBucket:
+    __slots__ = ("rate", "burst", "tokens", "stamp")
+
+    def __init__(self, rate, burst):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = float(burst)
+        self.stamp = time.monotonic()
+
+    def take(self, n=1):
+        now = time.monotonic()
+        self.tokens = min(self.burst, self.tokens + (now - self.stamp) * self.rate)
+        self.stamp = now
+        if self.tokens < n:
+            return False
+        self.tokens -= n
+        return True
+
+class Admission:
+    """Global and per-IP connection caps."""
+    def __init__(self, max_connections=MAX_CONNECTIONS, max_per_ip=MAX_PER_IP):
+        self.max_connections = max_connections
+        self.max_per_ip = max_per_ip
+        self.open = 0
+        self.per_ip = {}   # ip -> open connections
+        self.lock = threading.Lock()
+
+    def admit(self, ip):
+        """Reserve a slot for `ip`; returns None, or the reason it was refused."""
+        with self.lock:
+            if self.max_connections and self.open >= self.max_connections:
+                return "server_full"
+            n = self.per_ip.get(ip, 0)
+            if self.max_per_ip and n >= self.max_per_ip:
+                return "ip_limit"
+            self.open += 1
+            self.per_ip[ip] = n + 1
+            return None
+
+    def release(self, ip):
+        with self.lock:
+            self.open -= 1
+            n = self.per_ip.pop(ip) - 1
+            if n:
+                self.per_ip[ip] = n
@@ -0,0 +1,128 @@
+"""Headless load generator for RpsServer.
+
+Launches N simulated players (gamecore.RpsClient) in one asyncio
+process. Each joins, answers every start_round with a random move and
+waits for round_result. Prints
+connections/s, rounds/s and move -> round_result latency percentiles,
+and can save them as JSON to compare server changes run to run.
+"""
+import argparse, asyncio, json, random, time
+from gameproto import PROTOCOLS
+from gamecore import RpsClient
+from gamematch import MOVES
+
+def percentile(sorted_values, pct):
+    if not sorted_values:
+        return None
+    k = min(len(sorted_values) - 1, int(round(pct / 100 * (len(sorted_values) - 1))))
+    return sorted_values[k]
+
+class LoadStats:
+    def __init__(self):
+        self.joined = 0
+        self.failed = 0
+        self.join_times = []   # seconds from test start to join_ack
+        self.latencies = []    # seconds from move sent to round_result
+        self.rounds = set()    # (match, round) seen completed
+        self.errors = 0
+
+async def run_player(i, args, stats, start, stop):
+    # A drop counts, it isn't papered over; no RTT pings mixed into the measured traffic
+    client = RpsClient(f"load{i}", args.proto, retries=0, ping_every=0)
+    try:
+        await client.connect(args.host, args.port)
+        await client.join()
+    except OSError:
+        stats.failed += 1
+        client.close()
+        return
+    stats.joined += 1
+    stats.join_times.append(time.perf_counter() - start)
+    sent_at = None
+    played = 0
+    try:
+        async for event in client:
+            mtype = event["type"]
+            if mtype == "start_round":
+                if args.think:
+                    await asyncio.sleep(random.uniform(0, args.think))
+                sent_at = time.perf_counter()
+                client.play(random.choice(MOVES))
+            elif mtype == "round_result":
+                if sent_at is not None:
+                    stats.latencies.append(time.perf_counter() - sent_at)
+                    sent_at = None
+                stats.rounds.add((client.match, client.round))
+                played += 1
+            elif mtype == "error":
+                stats.errors += 1
+            if stop.is_set() or (args.rounds and played >= args.rounds):
+                break
+        await client.quit()
+    except (OSError, asyncio.CancelledError):
+        pass
+    finally:
+        client.close()
+
+async def run(args):
+    stats = LoadStats()
+    stop = asyncio.Event()
+    start = time.perf_counter()
+    tasks = []
+    for i in range(args.players):
+        tasks.append(asyncio.create_task(run_player(i, args, stats, start, stop)))
+        if args.ramp and (i + 1) % args.ramp == 0:
+            await asyncio.sleep(0.01)
+    done, pending = await asyncio.wait(tasks, timeout=args.duration)
+    stop.set()
+    elapsed = time.perf_counter() - start
+    for t in pending:
+        t.cancel()
+    await asyncio.gather(*pending, return_exceptions=True)
+    return stats, elapsed
+
+def report(args, stats, elapsed):
+    lat = sorted(stats.latencies)
+    connect_span = max(stats.join_times) if stats.join_times else None
+    ms = lambda v: None if v is None else round(v * 1000, 3)
+    return {
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "config": {k: getattr(args, k) for k in ("host", "port", "players", "duration", "rounds", "proto", "think")},
+        "elapsed_s": round(elapsed, 3),
+        "joined": stats.joined,
+        "failed": stats.failed,
+        "errors": stats.errors,
+        "connections_per_s": round(stats.joined / connect_span, 1) if connect_span else None,
+        "rounds": len(stats.rounds),
+        "rounds_per_s": round(len(stats.rounds) / elapsed, 1),
+        "latency_ms": {
+            "samples": len(lat),
+            "p50": ms(percentile(lat, 50)),
+            "p95": ms(percentile(lat, 95)),
+            "p99": ms(percentile(lat, 99)),
+            "max": ms(lat[-1] if lat else None),
+        },
+    }
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description="RpsServer load generator")
+    ap.add_argument("--host", default="127.0.0.1")
+    ap.add_argument("--port", type=int, default=12345)
+    ap.add_argument("--players", type=int, default=100)
+    ap.add_argument("--duration", type=float, default=10.0, help="seconds before the run is stopped")
+    ap.add_argument("--rounds", type=int, default=0, help="rounds per player, 0 = until --duration")
+    ap.add_argument("--proto", choices=PROTOCOLS, default="json")
+    ap.add_argument("--think", type=float, default=0.0, help="max random delay before each move, seconds")
+    ap.add_argument("--ramp", type=int, default=0, help="open connections in batches of this size")
+    ap.add_argument("--out", help="write the results as JSON to this file")
+    args = ap.parse_args()
+    stats, elapsed = asyncio.run(run(args))
+    result = report(args, stats, elapsed)
+    lat = result["latency_ms"]
+    print(f"joined {result['joined']}/{args.players} ({result['failed']} failed, {result['errors']} errors)")
+    print(f"connections/s {result['connections_per_s']}  rounds {result['rounds']}  rounds/s {result['rounds_per_s']}")
+    print(f"latency ms p50 {lat['p50']}  p95 {lat['p95']}  p99 {lat['p99']}  max {lat['max']}")
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump(result, f, indent=2)
+        print(f"saved {args.out}")
@@ -0,0 +1,199 @@
+import itertools, threading
+from collections import OrderedDict
+
+MATCH_SIZE = 2
+MAX_ROOM = 100
+MOVES = ("rock", "paper", "scissors")
+BEATS = {"rock": "scissors", "paper": "rock", "scissors": "paper"}
+BEATEN_BY = {loser: winner for winner, loser in BEATS.items()}
+LETTERS = {"rock": "R", "paper": "P", "scissors": "S", None: "-"}  # round_result "moves" string
+KEYS = {"rock": "rock", "paper": "paper", "scissors": "scissors", None: "none"}
+
+def determine(a, b):
+    if a == b:
+        return "tie"
+    return "win" if BEATS[a] == b else "lose"
+
+def tally(moves):
+    """Score every move against the whole field from per-move counts, in O(N).
+
+    A move wins one point per player it beats, and a missing move (None,
+    timed out) counts as beaten by every real move. Returns the counts
+    keyed like KEYS, and the points and outcome (more wins than losses is
+    a win) of each move that was played. With two players this is exactly
+    the pairwise `determine`.
+    """
+    counts = dict.fromkeys(KEYS.values(), 0)
+    for m in moves:
+        counts[KEYS[m]] += 1
+    points, outcomes = {}, {}
+    if counts["none"]:
+        points["none"] = 0
+        outcomes["none"] = "tie" if counts["none"] == sum(counts.values()) else "lose"
+    for m in MOVES:
+        if counts[m]:
+            wins = counts[BEATS[m]] + counts["none"]
+            losses = counts[BEATEN_BY[m]]
+            points[m] = wins
+            outcomes[m] = "win" if wins > losses else ("lose" if wins < losses else "tie")
+    return counts, points, outcomes
+
+# One game ---------------------------------------------------------
+class Match:
+    """Round counter, scores and round state of one independent game.
+
+    Methods only mutate state and return the packet to broadcast (or
+    None); sending is left to the server, which calls them with `lock` held.
+    Any number of players from 2 to MAX_ROOM can share one match.
+    """
+    def __init__(self, match_id, players, lock=None):
+        self.id = match_id
+        self.players = players
+        self.lock = lock if lock is not None else threading.Lock()
+        self.round_index = 0
+        self.state = "ready"  # ready -> playing -> ready ... -> ended
+        self.deadline = None  # move timeout timer of the round in play
+        self.moved = 0        # players with a move in this round
+        self.sat_out = set()  # away players whose move this round counts as missing
+        for p in players:
+            p.match = self
+            p.move = None
+            p.score = 0
+
+    def players_packet(self, seat=None):
+        """Seat order of the room; `seat` tells one recipient which entry is theirs."""
+        data = {"players": [p.name for p in self.players]}
+        if seat is not None:
+            data["seat"] = seat
+        return {"type": "players", "data": data}
+
+    def start_round(self):
+        if self.state != "ready":
+            return None
+        for p in self.players:
+            p.move = None
+        self.moved = 0
+        self.sat_out.clear()
+        self.round_index += 1
+        self.state = "playing"
+        return {
+            "type": "start_round",
+            "data": {
+                "round": self.round_index,
+                "match": self.id,
+                "message": f"Round {self.round_index} - choose your move"
+            }
+        }
+
+    def submit(self, player, move):
+        """Record a move; returns the round_result packet once all moves are in."""
+        player.move = move
+        self.moved += 1
+        if self.moved < len(self.players):
+            return None
+        self.state = "ready"
+        return self.evaluate()
+
+    def pauses_for(self):
+        """True while the next round has to wait for an away player: always in
+        a 1v1, and in a room only once nobody present is left to play."""
+        return any(p.away for p in self.players) and (
+            len(self.players) == 2 or all(p.away or p.is_bot for p in self.players))
+
+    def sit_out(self, player):
+        """Count an away player's move as missing, like a timeout; returns
+        round_result if the round was only waiting on them."""
+        self.sat_out.add(player)
+        return self.submit(player, None)
+
+    def continues_without(self, player):
+        """A room outlives a leaver while two players, one of them human, stay."""
+        return len(self.players) > 2 and any(
+            p is not player and p.active and not p.is_bot for p in self.players)
+
+    def leave(self, player):
+        """Drop a player from a room that carries on; returns round_result if
+        the round was only waiting on them."""
+        self.players.remove(player)
+        player.match = None
+        if player.move is not None or player in self.sat_out:
+            self.moved -= 1
+        self.sat_out.discard(player)
+        if self.state == "playing" and self.moved == len(self.players):
+            self.state = "ready"
+            return self.evaluate()
+        return None
+
+    def forfeit(self):
+        """Close the round at its deadline; a player without a move loses it."""
+        self.state = "ready"
+        return self.evaluate()
+
+    def evaluate(self):
+        counts, points, outcomes = tally(p.move for p in self.players)
+        for p in self.players:
+            p.score += points[KEYS[p.move]]
+        # Aggregated: one letter and one score per seat (players_packet order),
+        # plus per-move tables, instead of listing every pairing
+        return {
+            "type": "round_result",
+            "data": {
+                "round": self.round_index,
+                "moves": "".join(LETTERS[p.move] for p in self.players),
+                "scores": [p.score for p in self.players],
+                "counts": counts,
+                "outcomes": outcomes
+            }
+        }
+
+# Matchmaking ------------------------------------------------------
+class MatchRegistry:
+    """FIFO matchmaking queue plus the table of running matches.
+
+    Everything is O(1) per player: the queue is an OrderedDict so a
+    waiting player who leaves can be dropped without a scan. Callers
+    are expected to hold the server's registration lock; `lock` is the
+    factory for each new match's own lock.
+    """
+    def __init__(self, match_size=MATCH_SIZE, lock=threading.Lock):
+        self.match_size = match_size
+        self.lock = lock
+        self.waiting = OrderedDict()  # PlayerConn -> None, in join order
+        self.matches = {}             # match id -> Match
+        self.ids = itertools.count(1)
+
+    def number_after(self, last, first=1, step=1):
+        """Hand out match ids above `last` (e.g. the highest one in the replay log),
+        keeping them congruent to `first` modulo `step`."""
+        start = first + max(0, last - first + step) // step * step
+        self.ids = itertools.count(start, step)
+
+    def enqueue(self, player):
+        """Queue a player; returns (queue position, new Match or None)."""
+        player.match = None
+        self.waiting[player] = None
+        position = len(self.waiting)
+        if position < self.match_size:
+            return position, None
+        players = [self.waiting.popitem(last=False)[0] for _ in range(self.match_size)]
+        match = Match(next(self.ids), players, self.lock())
+        self.matches[match.id] = match
+        return position, match
+
+    def remove(self, player):
+        """Forget a player; ends their match and returns the players left in it."""
+        if player in self.waiting:
+            del self.waiting[player]
+            return []
+        match = player.match
+        if match is None:
+            return []
+        return self.end(match, player)
+
+    def end(self, match, leaver=None):
+        """Drop a match; the caller holds match.lock as well."""
+        match.state = "ended"
+        self.matches.pop(match.id, None)
+        for p in match.players:
+            p.match = None
+        return [p for p in match.players if p is not leaver and p.active]
@@ -0,0 +1,211 @@
+import bisect, json, threading, time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Histogram buckets: powers of two from 1us to ~67s, plus overflow
+BUCKETS = tuple(2.0 ** e for e in range(-20, 7))
+
+def bucket_percentile(counts, n, pct, peak):
+    rank = pct / 100 * n
+    seen = 0
+    for i, c in enumerate(counts):
+        seen += c
+        if c and seen >= rank:
+            return min(BUCKETS[i], peak) if i < len(BUCKETS) else peak
+    return 0.0
+
+class PerThread:
+    """One private cell per thread, so recording takes no shared lock.
+
+    Readers add the cells up. Cells of threads that have exited are folded
+    into `base` on the next read, so a thread-per-connection server keeps
+    one cell per live thread, not one per connection ever served.
+    """
+    __slots__ = ("new", "fold", "local", "cells", "base", "lock")
+
+    def __init__(self, new, fold):
+        self.new = new      # () -> empty cell
+        self.fold = fold    # (into, cell) -> None
+        self.local = threading.local()
+        self.cells = {}     # Thread -> cell
+        self.base = new()
+        self.lock = threading.Lock()  # registration and reads only
+
+    def cell(self):
+        try:
+            return self.local.cell
+        except AttributeError:
+            cell = self.local.cell = self.new()
+            with self.lock:
+                self.cells[threading.current_thread()] = cell
+            return cell
+
+    def read(self):
+        """Every cell, the folded base first; values may lag a write in progress."""
+        with self.lock:
+            for t in [t for t in self.cells if not t.is_alive()]:
+                self.fold(self.base, self.cells.pop(t))
+            return [self.base, *self.cells.values()]
+
+def add_cells(into, cell):
+    for i, v in enumerate(cell):
+        into[i] += v
+
+class Counter:
+    __slots__ = ("shards",)
+
+    def __init__(self):
+        self.shards = PerThread(lambda: [0], add_cells)
+
+    def inc(self, n=1):
+        self.shards.cell()[0] += n
+
+    @property
+    def value(self):
+        return sum(c[0] for c in self.shards.read())
+
+def fold_histogram(into, cell):
+    for i in range(len(cell) - 1):
+        into[i] += cell[i]
+    into[-1] = max(into[-1], cell[-1])
+
+class Histogram:
+    """Fixed-size latency histogram; percentiles are bucket upper bounds.
+
+    A cell is the bucket counts followed by the total and the max.
+    """
+    __slots__ = ("shards",)
+
+    def __init__(self):
+        self.shards = PerThread(lambda: [0] * (len(BUCKETS) + 1) + [0.0, 0.0], fold_histogram)
+
+    def observe(self, seconds):
+        cell = self.shards.cell()
+        cell[bisect.bisect_left(BUCKETS, seconds)] += 1
+        cell[-2] += seconds
+        if seconds > cell[-1]:
+            cell[-1] = seconds
+
+    def export(self):
+        total = self.shards.new()
+        for cell in self.shards.read():
+            fold_histogram(total, cell)
+        return {"counts": total[:-2], "total": total[-2], "max": total[-1]}
+
+    def merge(self, raw):
+        with self.shards.lock:
+            fold_histogram(self.shards.base, raw["counts"] + [raw["total"], raw["max"]])
+
+    def snapshot(self):
+        raw = self.export()
+        counts, total, peak = raw["counts"], raw["total"], raw["max"]
+        n = sum(counts)
+        ms = lambda v: round(v * 1000, 3)
+        return {
+            "count": n,
+            "mean_ms": ms(total / n) if n else 0.0,
+            "p50_ms": ms(bucket_percentile(counts, n, 50, peak)),
+            "p95_ms": ms(bucket_percentile(counts, n, 95, peak)),
+            "p99_ms": ms(bucket_percentile(counts, n, 99, peak)),
+            "max_ms": ms(peak),
+        }
+
+class TimedLock:
+    """Wraps a lock and records how long a `with` waited for it, when it had to wait.
+
+    An uncontended acquire costs one non-blocking try and records nothing,
+    so instrumenting per-match locks adds no shared state to the hot path.
+    """
+    __slots__ = ("lock", "waits")
+
+    def __init__(self, lock, waits):
+        self.lock = lock
+        self.waits = waits
+
+    def __enter__(self):
+        if not self.lock.acquire(False):
+            t = time.perf_counter()
+            self.lock.acquire()
+            self.waits.observe(time.perf_counter() - t)
+        return self
+
+    def __exit__(self, *exc):
+        self.lock.release()
+
+# Registry ---------------------------------------------------------
+class Metrics:
+    def __init__(self):
+        self.started = time.time()
+        self.counters = {}
+        self.histograms = {}
+        self.gauges = {}
+
+    def counter(self, name):
+        return self.counters.setdefault(name, Counter())
+
+    def histogram(self, name):
+        return self.histograms.setdefault(name, Histogram())
+
+    def gauge(self, name, fn):
+        self.gauges[name] = fn
+
+    def export(self):
+        """Raw, mergeable dump of every metric (see merge_exports)."""
+        return {
+            "started": self.started,
+            "counters": {k: c.value for k, c in self.counters.items()},
+            "gauges": {k: fn() for k, fn in self.gauges.items()},
+            "histograms": {k: h.export() for k, h in self.histograms.items()},
+        }
+
+    def snapshot(self):
+        return {
+            "uptime_s": round(time.time() - self.started, 1),
+            "counters": {k: c.value for k, c in self.counters.items()},
+            "gauges": {k: fn() for k, fn in self.gauges.items()},
+            "latency": {k: h.snapshot() for k, h in self.histograms.items()},
+        }
+
+def combine(exports):
+    """Metrics.export() dumps, e.g. one per worker process, added into one Metrics."""
+    merged = Metrics()
+    gauges = {}
+    for raw in exports:
+        merged.started = min(merged.started, raw["started"])
+        for k, v in raw["counters"].items():
+            merged.counter(k).inc(v)
+        for k, v in raw["gauges"].items():
+            gauges[k] = gauges.get(k, 0) + v
+        for k, h in raw["histograms"].items():
+            merged.histogram(k).merge(h)
+    for k, v in gauges.items():
+        merged.gauge(k, lambda v=v: v)
+    return merged
+
+def combine_exports(exports):
+    """Add export dumps into one dump of the same shape."""
+    return combine(exports).export()
+
+def merge_exports(exports):
+    """Combine export dumps into one snapshot."""
+    return combine(exports).snapshot()
+
+def serve_http(metrics, host, port):
+    """Expose metrics.snapshot() as JSON on a small HTTP port, in a daemon thread.
+
+    `metrics` is anything with a snapshot() method returning a dict.
+    """
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            body = json.dumps(metrics.snapshot()).encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    httpd = ThreadingHTTPServer((host, port), Handler)
+    threading.Thread(target=httpd.serve_forever, daemon=True).start()
+    return httpd
@@ -0,0 +1,158 @@
+import json, struct
+from gamematch import LETTERS, tally
+
+MAX_FRAME = 64 * 1024     # longest accepted frame, header/newline excluded
+RECV_CHUNK = 64 * 1024
+
+class FrameTooLarge(ValueError):
+    pass
+
+# Wire formats ----------------------------------------------------
+# Two framings share one stream. A JSON frame is one line of JSON and
+# always starts with "{". A binary frame starts with a byte that has the
+# high bit set: the 2-byte header is 0x8000 | body length, and the body
+# is an opcode followed by fixed fields. Only hot messages get their own
+# opcode; everything else travels as OP_JSON.
+PROTOCOLS = ("json", "binary")
+
+OP_JSON, OP_MOVE, OP_QUIT, OP_START_ROUND, OP_ROUND_RESULT = range(5)
+
+MOVE_NAMES = ("rock", "paper", "scissors", None)  # None: no move (timed out)
+MOVE_CODES = {name: code for code, name in enumerate(MOVE_NAMES)}
+CODE_LETTERS = "".join(LETTERS[name] for name in MOVE_NAMES)
+LETTER_CODES = {letter: code for code, letter in enumerate(CODE_LETTERS)}
+OUTCOMES = ("tie", "win", "lose")
+OUTCOME_CODES = {name: code for code, name in enumerate(OUTCOMES)}
+
+HEADER = struct.Struct("!H")
+MAX_BINARY_BODY = 0x7FFF
+START_ROUND = struct.Struct("!BIII")        # op, round, match, timeout ms
+ROUND_RESULT = struct.Struct("!BIB")        # op, round, seats; then a move code per seat, a !I score per seat
+
+def encode_json(obj):
+    return json.dumps(obj, separators=(",", ":")).encode("utf-8") + b"\n"
+
+def encode_binary(obj):
+    mtype = obj.get("type")
+    data = obj.get("data") or {}
+    if mtype == "move" and data.get("move") in MOVE_CODES:
+        body = bytes((OP_MOVE, MOVE_CODES[data["move"]]))
+    elif mtype == "quit":
+        body = bytes((OP_QUIT,))
+    elif mtype == "start_round":
+        body = START_ROUND.pack(OP_START_ROUND, data["round"], data.get("match", 0),
+                                int(data.get("timeout", 0) * 1000))
+    elif mtype == "round_result":
+        moves, scores = data["moves"], data["scores"]
+        body = (ROUND_RESULT.pack(OP_ROUND_RESULT, data["round"], len(moves))
+                + bytes(LETTER_CODES[c] for c in moves)
+                + struct.pack(f"!{len(scores)}I", *scores))
+    else:
+        body = bytes((OP_JSON,)) + json.dumps(obj, separators=(",", ":")).encode("utf-8")
+    if len(body) > MAX_BINARY_BODY:
+        raise FrameTooLarge(f"binary body of {len(body)} bytes")
+    return HEADER.pack(0x8000 | len(body)) + body
+
+def encode_frame(obj, proto="json"):
+    return encode_binary(obj) if proto == "binary" else encode_json(obj)
+
+# Framed stream reader --------------------------------------------
+class FrameReader:
+    """Buffered reader for both framings, one per connection.
+
+    `feed` works on raw bytes so the same object can sit behind a
+    blocking socket or an asyncio stream. A frame that cannot be decoded
+    comes out as None, like the old recv_json_line did. Binary
+    round_result frames carry only move codes and scores; the per-move
+    tables are rebuilt with the same tally the server used.
+    """
+    def __init__(self, sock=None, max_frame=MAX_FRAME, chunk_size=RECV_CHUNK):
+        self.sock = sock
+        self.max_frame = max_frame
+        self.chunk_size = chunk_size
+        self.buf = bytearray()
+        self.scanned = 0  # prefix of buf already known to hold no newline
+
+    def feed(self, data):
+        buf = self.buf
+        buf += data
+        size = len(buf)
+        out = []
+        start = 0
+        while start < size:
+            if buf[start] & 0x80:
+                if size - start < HEADER.size:
+                    break
+                end = start + HEADER.size + (HEADER.unpack_from(buf, start)[0] & 0x7FFF)
+                if end - start - HEADER.size > self.max_frame:
+                    raise FrameTooLarge(f"frame of {end - start} bytes")
+                if end > size:
+                    break
+                out.append(self.decode_binary(bytes(buf[start + HEADER.size:end])))
+                start = end
+            else:
+                pos = buf.find(b"\n", max(start, self.scanned))
+                if pos == -1:
+                    if size - start > self.max_frame:
+                        raise FrameTooLarge(f"unterminated frame of {size - start} bytes")
+                    break
+                if pos - start > self.max_frame:
+                    raise FrameTooLarge(f"frame of {pos - start} bytes")
+                try:
+                    out.append(json.loads(buf[start:pos]))
+                except ValueError:
+                    out.append(None)
+                start = pos + 1
+        if start:
+            del buf[:start]
+        # Whatever is left is one partial frame; a partial line has no newline yet
+        self.scanned = len(buf) if buf and not buf[0] & 0x80 else 0
+        return out
+
+    def decode_binary(self, body):
+        try:
+            op = body[0]
+            if op == OP_MOVE:
+                return {"type": "move", "data": {"move": MOVE_NAMES[body[1]]}}
+            if op == OP_QUIT:
+                return {"type": "quit"}
+            if op == OP_START_ROUND:
+                _, rnd, match, timeout_ms = START_ROUND.unpack(body)
+                data = {"round": rnd, "match": match, "message": f"Round {rnd} - choose your move"}
+                if timeout_ms:
+                    data["timeout"] = timeout_ms / 1000
+                return {"type": "start_round", "data": data}
+            if op == OP_ROUND_RESULT:
+                _, rnd, seats = ROUND_RESULT.unpack_from(body)
+                codes = body[ROUND_RESULT.size:ROUND_RESULT.size + seats]
+                scores = struct.unpack_from(f"!{seats}I", body, ROUND_RESULT.size + seats)
+                counts, _, outcomes = tally(MOVE_NAMES[c] for c in codes)
+                return {
+                    "type": "round_result",
+                    "data": {
+                        "round": rnd,
+                        "moves": "".join(CODE_LETTERS[c] for c in codes),
+                        "scores": list(scores),
+                        "counts": counts,
+                        "outcomes": outcomes
+                    }
+                }
+            if op == OP_JSON:
+                return json.loads(body[1:])
+        except (IndexError, KeyError, TypeError, ValueError, struct.error):
+            pass
+        return None
+
+    def read(self):
+        """One recv() worth of messages; None once the peer has closed."""
+        chunk = self.sock.recv(self.chunk_size)
+        if not chunk:
+            return None
+        return self.feed(chunk)
+
+    def __iter__(self):
+        while True:
+            msgs = self.read()
+            if msgs is None:
+                return
+            yield from msgs
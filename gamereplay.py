@@ -0,0 +1,269 @@
+"""Binary replay log of every round, for analytics and disputes.
+
+Each seat of each finished round is one fixed-width 24-byte record in
+replay.bin, in finishing order, so record N is at byte 24*N and the
+timestamps never go down. Player names are stored once in players.log
+(id = line number). Every INDEX_EVERY records a sparse index entry
+(first record, timestamp, lowest and highest match id of the block) is
+appended to replay.idx, and one (match id, block number) pair per match
+in the block to replay.mat, so a lookup only touches the blocks that
+hold what it asks for. Long matches overlap in id range, which is why
+by_match goes through replay.mat rather than the min/max of the index.
+
+The server side only enqueues, like ScoreStore. The reader maps the
+files read-only and views them as NumPy arrays, so nothing is loaded
+into RAM beyond the pages a query touches.
+
+    python gamereplay.py DIR --match 42
+    python gamereplay.py DIR --since 2025-01-01T10:00 --until 2025-01-01T11:00
+"""
+import argparse, bisect, mmap, os, queue, struct, threading, time
+from gameproto import MOVE_CODES, MOVE_NAMES, OUTCOMES, OUTCOME_CODES
+
+FLUSH_INTERVAL = 0.2
+INDEX_EVERY = 4096   # records per sparse index entry
+
+# ts ms, match, round, player id, seat, move code, outcome code, seats in room
+RECORD = struct.Struct("<QIIIBBBB")
+INDEX = struct.Struct("<QQII")        # first record, ts ms, min match, max match
+PAIR = struct.Struct("<II")           # match id, block number; sorted by block, then match
+
+class ReplayLog:
+    """Appends round records from a writer thread; the game path never touches the disk."""
+    def __init__(self, path):
+        self.path = path
+        os.makedirs(path, exist_ok=True)
+        self.pending = queue.SimpleQueue()
+        self.ids = {}
+        names = os.path.join(path, "players.log")
+        if os.path.exists(names):
+            with open(names, encoding="utf-8") as f:
+                for i, line in enumerate(f):
+                    self.ids[line.rstrip("\n")] = i
+        self.names = open(names, "a", encoding="utf-8")
+        self.data = open(os.path.join(path, "replay.bin"), "a+b")
+        self.index = open(os.path.join(path, "replay.idx"), "a+b")
+        self.pairs = open(os.path.join(path, "replay.mat"), "a+b")
+        self.count = self.trim(self.data, RECORD.size)
+        self.last_ts = 0
+        self.block = None   # [first record, ts, min match, max match] of the open index block
+        self.block_matches = set()
+        self.recover()
+        self.closed = threading.Event()
+        self.writer = threading.Thread(target=self.write_loop, daemon=True)
+        self.writer.start()
+
+    @staticmethod
+    def trim(f, width):
+        """Cut a torn last entry left by a crash; returns the number of whole entries."""
+        size = f.seek(0, os.SEEK_END)
+        if size % width:
+            f.truncate(size - size % width)
+        return size // width
+
+    def read_block(self, block):
+        self.data.seek(block * INDEX_EVERY * RECORD.size)
+        return list(RECORD.iter_unpack(self.data.read(INDEX_EVERY * RECORD.size)))
+
+    @staticmethod
+    def pack_pairs(block, matches):
+        return b"".join(PAIR.pack(m, block) for m in sorted(matches))
+
+    def recover(self):
+        """Rebuild index entries and match pairs the data file got ahead of, and the open block."""
+        indexed = self.trim(self.index, INDEX.size)
+        # Pairs are written before their index entry, so at most the last block's
+        # worth can be past the index; a log from before replay.mat has none at all
+        count = self.trim(self.pairs, PAIR.size)
+        tail = min(count, 2 * INDEX_EVERY)
+        self.pairs.seek((count - tail) * PAIR.size)
+        blocks = [b for _, b in PAIR.iter_unpack(self.pairs.read(tail * PAIR.size))]
+        keep = bisect.bisect_left(blocks, indexed)
+        self.pairs.truncate((count - tail + keep) * PAIR.size)
+        self.pairs.seek(0, os.SEEK_END)
+        for block in range(blocks[keep - 1] + 1 if keep else 0, indexed):
+            self.pairs.write(self.pack_pairs(block, {r[1] for r in self.read_block(block)}))
+        for block in range(indexed, -(-self.count // INDEX_EVERY)):
+            recs = self.read_block(block)
+            matches = [r[1] for r in recs]
+            self.block = [block * INDEX_EVERY, recs[0][0], min(matches), max(matches)]
+            self.block_matches = set(matches)
+            self.last_ts = recs[-1][0]
+            if len(recs) == INDEX_EVERY:
+                self.pairs.write(self.pack_pairs(block, self.block_matches))
+                self.index.write(INDEX.pack(*self.block))
+                self.block = None
+                self.block_matches = set()
+        if self.count and not self.last_ts:
+            self.data.seek((self.count - 1) * RECORD.size)
+            self.last_ts = RECORD.unpack(self.data.read(RECORD.size))[0]
+        self.pairs.flush()
+        self.index.flush()
+        # Highest match id on disk, so the server can number new matches above it
+        self.index.seek(0)
+        self.last_match = max((entry[3] for entry in INDEX.iter_unpack(self.index.read())), default=0)
+        if self.block is not None:
+            self.last_match = max(self.last_match, self.block[3])
+        self.data.seek(0, os.SEEK_END)
+
+    def record(self, match_id, round_index, seats):
+        """`seats` is one (name, move, outcome) triple per seat, in seat order."""
+        self.pending.put((time.time(), match_id, round_index, seats))
+
+    def write_loop(self):
+        while True:
+            closed = self.closed.wait(FLUSH_INTERVAL)
+            try:
+                self.flush()
+            except Exception as e:
+                # Keep writing later rounds; a dead writer would let the queue grow forever
+                print(f"[REPLAY] Flush failed: {e}")
+            if closed:
+                break
+
+    def player_id(self, name):
+        pid = self.ids.get(name)
+        if pid is None:
+            pid = self.ids[name] = len(self.ids)
+            self.names.write(name.replace("\n", " ") + "\n")
+        return pid
+
+    def flush(self):
+        out = bytearray()
+        index = bytearray()
+        pairs = bytearray()
+        try:
+            while True:
+                ts, match_id, round_index, seats = self.pending.get_nowait()
+                if not all(isinstance(name, str) and move in MOVE_CODES and outcome in OUTCOME_CODES
+                           for name, move, outcome in seats):
+                    # Checked before any state changes, so the count still matches the file
+                    print(f"[REPLAY] Skipped match {match_id} round {round_index}: invalid record {seats!r}")
+                    continue
+                # Never let time go backwards in the file, so it stays sorted by ts
+                ts_ms = self.last_ts = max(self.last_ts, int(ts * 1000))
+                for seat, (name, move, outcome) in enumerate(seats):
+                    if self.block is None:
+                        self.block = [self.count, ts_ms, match_id, match_id]
+                    block = self.block
+                    block[2] = min(block[2], match_id)
+                    block[3] = max(block[3], match_id)
+                    self.block_matches.add(match_id)
+                    out += RECORD.pack(ts_ms, match_id, round_index, self.player_id(name), seat,
+                                       MOVE_CODES[move], OUTCOME_CODES[outcome], len(seats))
+                    self.count += 1
+                    if self.count % INDEX_EVERY == 0:
+                        index += INDEX.pack(*block)
+                        pairs += self.pack_pairs(block[0] // INDEX_EVERY, self.block_matches)
+                        self.block = None
+                        self.block_matches = set()
+        except queue.Empty:
+            pass
+        if not out:
+            return
+        self.names.flush()
+        self.data.write(out)
+        self.data.flush()
+        if index:
+            self.pairs.write(pairs)
+            self.pairs.flush()
+            self.index.write(index)
+            self.index.flush()
+
+    def close(self):
+        self.closed.set()
+        self.writer.join(2)
+        for f in (self.names, self.data, self.index, self.pairs):
+            f.close()
+
+# Reading ----------------------------------------------------------
+class ReplayReader:
+    """Read-only, memory-mapped view of a replay directory (needs numpy)."""
+    def __init__(self, path):
+        import numpy as np
+        self.np = np
+        record = np.dtype([("ts", "<u8"), ("match", "<u4"), ("round", "<u4"), ("player", "<u4"),
+                           ("seat", "u1"), ("move", "u1"), ("outcome", "u1"), ("seats", "u1")])
+        index = np.dtype([("first", "<u8"), ("ts", "<u8"), ("min_match", "<u4"), ("max_match", "<u4")])
+        self.records = self.map(os.path.join(path, "replay.bin"), record)
+        self.index = self.map(os.path.join(path, "replay.idx"), index)
+        # Blocks without pairs (not indexed yet, or a log the writer hasn't reopened
+        # since replay.mat was added) are scanned in full by by_match
+        pairs = self.map(os.path.join(path, "replay.mat"), np.dtype([("match", "<u4"), ("block", "<u4")]))
+        self.pairs = pairs[:int(np.searchsorted(pairs["block"], len(self.index)))]
+        self.paired = int(self.pairs["block"][-1]) + 1 if len(self.pairs) else 0
+        with open(os.path.join(path, "players.log"), encoding="utf-8") as f:
+            self.names = [line.rstrip("\n") for line in f]
+
+    def map(self, filename, dtype):
+        size = os.path.getsize(filename) // dtype.itemsize * dtype.itemsize if os.path.exists(filename) else 0
+        if not size:
+            return self.np.zeros(0, dtype)
+        with open(filename, "rb") as f:
+            mm = mmap.mmap(f.fileno(), size, access=mmap.ACCESS_READ)
+        return self.np.frombuffer(mm, dtype, size // dtype.itemsize)
+
+    def by_time(self, since=None, until=None):
+        """Records with since <= ts < until (epoch seconds), as one contiguous slice."""
+        np = self.np
+        ts = self.records["ts"]
+        lo, hi = 0, len(ts)
+        # The index narrows the binary search to one block at each end
+        if since is not None:
+            since_ms = int(since * 1000)
+            b = max(0, int(np.searchsorted(self.index["ts"], since_ms, "left")) - 1)
+            lo = b * INDEX_EVERY + int(np.searchsorted(ts[b * INDEX_EVERY:], since_ms, "left"))
+        if until is not None:
+            until_ms = int(until * 1000)
+            b = int(np.searchsorted(self.index["ts"], until_ms, "left"))
+            start = max(0, b - 1) * INDEX_EVERY
+            hi = start + int(np.searchsorted(ts[start:], until_ms, "left"))
+        return self.records[lo:max(lo, hi)]
+
+    def by_match(self, match_id):
+        """Every record of one match, scanning only the blocks it has records in."""
+        np = self.np
+        spans = [(b * INDEX_EVERY, (b + 1) * INDEX_EVERY)
+                 for b in self.pairs["block"][self.pairs["match"] == match_id].tolist()]
+        spans.append((self.paired * INDEX_EVERY, len(self.records)))
+        parts = [self.records[start:stop][self.records["match"][start:stop] == match_id]
+                 for start, stop in spans]
+        return np.concatenate(parts)
+
+    def rounds(self, records):
+        """Group records back into rounds: (ts, match, round, [(name, move, outcome), ...])."""
+        out = []
+        key = None
+        for r in records:
+            k = (int(r["match"]), int(r["round"]))
+            if k != key:
+                key = k
+                out.append((int(r["ts"]) / 1000, k[0], k[1], []))
+            out[-1][3].append((self.names[r["player"]], MOVE_NAMES[r["move"]], OUTCOMES[r["outcome"]]))
+        return out
+
+def parse_time(text):
+    return time.mktime(time.strptime(text, "%Y-%m-%dT%H:%M"))
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description="Query an RpsServer replay log")
+    ap.add_argument("path", help="replay directory (gameserver.py --replay DIR)")
+    ap.add_argument("--match", type=int, help="show every round of this match")
+    ap.add_argument("--since", type=parse_time, help="local time, YYYY-MM-DDTHH:MM")
+    ap.add_argument("--until", type=parse_time, help="local time, YYYY-MM-DDTHH:MM")
+    ap.add_argument("--limit", type=int, default=50, help="rounds to print")
+    args = ap.parse_args()
+    reader = ReplayReader(args.path)
+    t = time.perf_counter()
+    if args.match is not None:
+        records = reader.by_match(args.match)
+    else:
+        records = reader.by_time(args.since, args.until)
+    elapsed = time.perf_counter() - t
+    moves = reader.np.bincount(records["move"], minlength=4)
+    print(f"{len(records):,} of {len(reader.records):,} records in {elapsed * 1000:.1f} ms; "
+          + ", ".join(f"{MOVE_NAMES[i] or 'timeout'} {n:,}" for i, n in enumerate(moves)))
+    for ts, match_id, round_index, seats in reader.rounds(records[:args.limit * 100])[:args.limit]:
+        stamp = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(ts))
+        print(f"{stamp} match {match_id} round {round_index}: "
+              + ", ".join(f"{name} {move or 'timeout'} {outcome}" for name, move, outcome in seats))
@@ -1,59 +1,126 @@
-import socket, threading, json, time, sys
+import socket, threading, time, sys, asyncio, argparse, contextlib, queue, logging, secrets
+from collections import OrderedDict
+from gameproto import FrameReader, FrameTooLarge, PROTOCOLS, encode_frame, encode_json
+from gamematch import MatchRegistry, MOVES, KEYS, MATCH_SIZE, MAX_ROOM, determine
+from gametimer import TimerWheel
+from gamemetrics import Metrics, TimedLock, serve_http
+from gamestore import ScoreStore, LEADERBOARD_SIZE, LEADERBOARD_MAX
+from gamereplay import ReplayLog
+from gamebots import BotPool, BOT_WAIT, STRATEGIES
+from gamelimits import Admission, TokenBucket, BACKLOG, MAX_CONNECTIONS, MAX_PER_IP, MSG_RATE, MSG_BURST
 
 HOST = "0.0.0.0"
 PORT = 12345
-MAX_PLAYERS = 2
-
-# Message helpers -------------------------------------------------
-def send_json(conn, obj):
-    try:
-        data = json.dumps(obj, separators=(",", ":")).encode("utf-8") + b"\n"
-        conn.sendall(data)
-    except Exception:
-        raise
-
-def recv_json_line(conn):
-    """Read until newline; simple line‑delimited JSON."""
-    buff = b""
-    while True:
-        chunk = conn.recv(1)
-        if not chunk:
-            return None
-        if chunk == b"\n":
-            break
-        buff += chunk
-    try:
-        return json.loads(buff.decode("utf-8"))
-    except Exception:
-        return None
+ROUND_DELAY = 0.5     # pause between a round_result and the next start_round
+MOVE_TIMEOUT = 30.0   # seconds to submit a move before forfeiting; 0 disables
+SEND_QUEUE_MAX = 64          # frames queued for one player before it is dropped
+SEND_BUFFER_MAX = 256 * 1024  # same limit in bytes for asyncio transports
+PING_INTERVAL = 15.0  # ping a connection after this long without hearing from it; 0 disables
+IDLE_TIMEOUT = 45.0   # evict a connection silent for this long; 0 disables
+REAP_INTERVAL = 1.0
+RESUME_GRACE = 30.0   # seconds a dropped player's seat is held for a resume; 0 disables
+MAX_NAME = 32         # characters kept of a player name
+# Sent to refused connections straight from the accept path, before any join
+REJECTIONS = {
+    reason: encode_json({"type": "error", "data": {"message": message, "reason": reason}})
+    for reason, message in (("server_full", "Server is full, try again later"),
+                            ("ip_limit", "Too many connections from your address"))
+}
+
+log = logging.getLogger("gameserver")
 
 # Core server -----------------------------------------------------
 class PlayerConn:
+    is_bot = False
+
     def __init__(self, conn, addr):
         self.conn = conn
         self.addr = addr
         self.name = None
         self.move = None
         self.score = 0
+        self.match = None
+        self.outbox = None  # bounded send queue, threaded engine only
+        self.proto = "json"  # wire format picked in the join message
+        self.last_seen = time.monotonic()
+        self.pinged = False
+        self.bucket = None  # message rate limit, see RpsServer.allow
+        self.throttled = False
+        self.admitted = False
+        self.bot_timer = None  # pending bot fill while this player waits alone
         self.active = True
+        self.token = None      # resume token handed out in join_ack
+        self.away = False      # connection lost, seat held until grace_timer fires
+        self.grace_timer = None
+        self.quitting = False  # left with "quit": no seat is held
+        self.rtt = None        # round trip the client last reported in a ping, seconds
 
 class RpsServer:
-    def __init__(self, host=HOST, port=PORT):
+    def __init__(self, host=HOST, port=PORT, move_timeout=MOVE_TIMEOUT, reuse_port=False, store_path=None,
+                 ping_interval=PING_INTERVAL, idle_timeout=IDLE_TIMEOUT, backlog=BACKLOG,
+                 max_connections=MAX_CONNECTIONS, max_per_ip=MAX_PER_IP, msg_rate=MSG_RATE, msg_burst=MSG_BURST,
+                 bot_wait=BOT_WAIT, bots=tuple(STRATEGIES), room_size=MATCH_SIZE, replay_path=None,
+                 resume_grace=RESUME_GRACE):
         self.host = host
         self.port = port
+        self.move_timeout = move_timeout
+        self.ping_interval = ping_interval
+        self.idle_timeout = idle_timeout
+        self.backlog = backlog
+        self.admission = Admission(max_connections, max_per_ip)
+        self.msg_rate = msg_rate
+        self.msg_burst = msg_burst
+        self.bot_wait = bot_wait
+        self.bots = BotPool(bots) if bot_wait else None
+        self.resume_grace = resume_grace
+        # Session table: resume token -> joined player. An away player stays in
+        # it (and in its match) with its seat and score until it resumes or expires.
+        self.sessions = {}
+        self.reuse_port = reuse_port  # several worker processes share the port
+        self.store = ScoreStore(store_path)
+        self.replay = ReplayLog(replay_path) if replay_path else None
         self.sock = None
-        self.lock = threading.Lock()
-        self.players = []  # list[PlayerConn]
-        self.round_index = 0
+        self.metrics = Metrics()
+        self.counts = {name: self.metrics.counter(name)
+                       for name in ("connections", "joins", "moves", "errors", "disconnects", "evictions",
+                                    "rejected_server_full", "rejected_ip_limit", "rejected_rate_limit", "bot_matches",
+                                    "resumes", "sessions_expired")}
+        self.move_latency = self.metrics.histogram("move_to_broadcast")
+        self.client_rtt = self.metrics.histogram("client_rtt")
+        self.lock_wait = self.metrics.histogram("lock_wait")
+        # Lock order: registry_lock, then a match's own lock. Both only guard
+        # in-memory state; sockets are written by the writer threads.
+        self.registry_lock = TimedLock(threading.Lock(), self.lock_wait)
+        self.players = set()  # every joined PlayerConn
+        self.registry = MatchRegistry(room_size, lock=lambda: TimedLock(threading.Lock(), self.lock_wait))
+        if self.replay is not None:
+            # Match ids key the replay log, so a restart must not reuse them
+            self.registry.number_after(self.replay.last_match)
+        self.timers = TimerWheel()
+        # Every open connection, least recently heard from first
+        self.activity = OrderedDict()
+        self.activity_lock = threading.Lock()
+        if ping_interval or idle_timeout:
+            self.call_later(REAP_INTERVAL, self.reap)
+        self.metrics.gauge("connections_open", lambda: len(self.activity))
+        self.metrics.gauge("players", lambda: len(self.players))
+        self.metrics.gauge("waiting", lambda: len(self.registry.waiting))
+        self.metrics.gauge("matches", lambda: len(self.registry.matches))
+        self.metrics.gauge("timers", lambda: self.timers.pending)
+        self.metrics.gauge("bots", lambda: self.bots.active if self.bots else 0)
+        self.metrics.gauge("sessions", lambda: len(self.sessions))
         self.running = True
 
     def start(self):
         self.sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
         self.sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        if self.reuse_port:
+            self.sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEPORT, 1)
         self.sock.bind((self.host, self.port))
-        self.sock.listen(5)
+        self.sock.listen(self.backlog)
         print(f"[SERVER] Listening on {self.host}:{self.port}")
         threading.Thread(target=self.accept_loop, daemon=True).start()
+        threading.Thread(target=self.timers.run, args=(lambda: self.running,), daemon=True).start()
         try:
             while self.running:
                 time.sleep(0.5)
@@ -69,142 +136,507 @@ class RpsServer:
                 conn, addr = self.sock.accept()
             except OSError:
                 break
+            reason = self.admission.admit(addr[0])
+            if reason:
+                self.reject(conn, reason)
+                continue
             threading.Thread(target=self.handle_client, args=(conn, addr), daemon=True).start()
 
-    def handle_client(self, conn, addr):
-        player = PlayerConn(conn, addr)
-        print(f"[SERVER] Connection from {addr}")
-        # First message must be join
-        first = recv_json_line(conn)
-        if not first or first.get("type") != "join":
-            send_json(conn, {"type": "error", "data": {"message": "Expected join"}})
-            conn.close()
-            return
-        player.name = first["data"].get("name", f"Player{int(time.time())}")
-        with self.lock:
-            if len(self.players) >= MAX_PLAYERS:
-                send_json(conn, {"type": "error", "data": {"message": "Server full"}})
-                conn.close()
-                print(f"[SERVER] Rejected {player.name} (full)")
-                return
-            self.players.append(player)
-            idx = len(self.players)
-        send_json(conn, {"type": "join_ack", "data": {"player_index": idx, "message": "Joined"}})
-        self.broadcast_player_status()
+    def reject(self, conn, reason):
+        """Refuse on the accept thread: one non-blocking send, then close."""
+        self.counts[f"rejected_{reason}"].inc()
+        try:
+            conn.setblocking(False)
+            conn.send(REJECTIONS[reason])
+        except OSError:
+            pass
+        conn.close()
 
-        # If now enough players start first round
-        self.maybe_start_round()
+    def new_player(self, conn, addr):
+        player = PlayerConn(conn, addr)
+        player.admitted = True
+        if self.msg_rate:
+            player.bucket = TokenBucket(self.msg_rate, self.msg_burst)
+        return player
 
+    def handle_client(self, conn, addr):
+        player = self.new_player(conn, addr)
+        player.outbox = queue.Queue(SEND_QUEUE_MAX)
+        self.counts["connections"].inc()
+        print(f"[SERVER] Connection from {addr}")
+        threading.Thread(target=self.write_loop, args=(player,), daemon=True).start()
+        self.track(player)
+        messages = iter(FrameReader(conn))
+        joined = False
         try:
-            while self.running and player.active:
-                msg = recv_json_line(conn)
-                if msg is None:
-                    break
-                mtype = msg.get("type")
-                if mtype == "move":
-                    self.register_move(player, msg["data"]["move"])
-                elif mtype == "quit":
-                    break
-                else:
-                    send_json(conn, {"type": "error", "data": {"message": "Unknown type"}})
+            # First message must be join
+            try:
+                first = next(messages, None)
+            except Exception:
+                first = None
+            joined = self.handle_join(player, first)
+            if joined:
+                for msg in messages:
+                    self.touch(player)
+                    if msg is None or not self.running:
+                        break
+                    if self.allow(player) and not self.handle_message(player, msg):
+                        break
         except Exception as e:
+            self.counts["errors"].inc()
             print(f"[SERVER] Error with {player.name}: {e}")
         finally:
-            self.disconnect(player)
-
-    def broadcast_player_status(self):
-        names = [p.name for p in self.players if p.active]
-        payload = {"type": "players", "data": {"players": names}}
-        self.broadcast(payload)
-
-    def maybe_start_round(self):
-        with self.lock:
-            if len([p for p in self.players if p.active]) == 2:
-                # Reset moves
-                for p in self.players:
-                    p.move = None
-                self.round_index += 1
-                self.broadcast({
-                    "type": "start_round",
-                    "data": {
-                        "round": self.round_index,
-                        "message": f"Round {self.round_index} - choose your move"
-                    }
-                })
+            # Every way out frees the admission slot, even a join that raised
+            if joined or player in self.players:
+                self.disconnect(player)
+            else:
+                # Writer flushes the error, then closes the socket
+                self.send_bytes(player, None)
+                self.untrack(player)
 
-    def register_move(self, player, move):
-        if move not in ("rock", "paper", "scissors"):
-            send_json(player.conn, {"type": "error", "data": {"message": "Invalid move"}})
+    # Protocol handling, shared by the threaded and asyncio engines
+    def handle_join(self, player, first):
+        if not isinstance(first, dict):
+            first = {}  # undecodable frame, or JSON that is not an object
+        if first.get("type") in ("stats", "leaderboard"):
+            # Monitoring tools may query without joining
+            self.handle_message(player, first)
+            return False
+        data = first.get("data")
+        if first.get("type") != "join" or not isinstance(data, dict):
+            self.send_error(player, "Expected join")
+            return False
+        name = data.get("name")
+        if name is not None and not isinstance(name, str):
+            self.send_error(player, "Invalid name")
+            return False
+        # Names end up in logs, the leaderboard and the replay file: one short line
+        player.name = " ".join((name or "").split())[:MAX_NAME] or f"Player{int(time.time())}"
+        if data.get("proto") in PROTOCOLS:
+            player.proto = data["proto"]
+        token = data.get("resume")
+        old = self.sessions.get(token) if token else None
+        if old is not None and old.active:
+            # Reconnected before we noticed the old link die (e.g. a NAT rebinding)
+            self.disconnect(old)
+        with self.registry_lock:
+            self.players.add(player)
+            if old is not None and old.away and self.take_seat(player, old):
+                match = player.match
+            else:
+                if self.resume_grace:
+                    player.token = secrets.token_urlsafe(12)
+                    self.sessions[player.token] = player
+                idx, match = self.registry.enqueue(player)
+                old = None
+        self.counts["joins"].inc()
+        if old is not None:
+            self.resumed(player, match)
+            return True
+        self.send(player, {"type": "join_ack", "data": {"player_index": idx, "message": "Joined",
+                                                       "proto": player.proto, "resume": player.token}})
+        if match is None:
+            self.send(player, {"type": "players", "data": {"players": [player.name], "seat": 0}})
+            self.wait_for_bot(player)
+        else:
+            self.start_match(match)
+        return True
+
+    def handle_message(self, player, msg):
+        """Dispatch one message from a joined player; False ends the session."""
+        mtype = msg.get("type")
+        if mtype == "move":
+            self.register_move(player, msg["data"]["move"])
+        elif mtype == "quit":
+            player.quitting = True
+            return False
+        elif mtype == "ping":
+            data = msg.get("data") or {}
+            self.send(player, {"type": "pong", "data": data})
+            rtt = data.get("rtt")
+            if isinstance(rtt, (int, float)) and 0 <= rtt < 60000:
+                # Kept per player for move-timeout fairness; the histogram shows the spread
+                player.rtt = rtt / 1000
+                self.client_rtt.observe(player.rtt)
+        elif mtype == "pong":
+            pass  # receiving it already counted as activity
+        elif mtype == "stats":
+            self.send_stats(player)
+        elif mtype == "leaderboard":
+            data = msg.get("data")
+            limit = data.get("limit", LEADERBOARD_SIZE) if isinstance(data, dict) else LEADERBOARD_SIZE
+            if type(limit) is not int or limit < 0:
+                self.send_error(player, "Invalid limit")
+            else:
+                top = self.store.leaderboard(min(limit, LEADERBOARD_MAX))
+                self.send(player, {"type": "leaderboard", "data": {"top": top}})
+        else:
+            self.send_error(player, "Unknown type")
+        return True
+
+    # Heartbeat
+    def track(self, player):
+        with self.activity_lock:
+            self.activity[player] = None
+
+    def untrack(self, player):
+        """Connection is over: forget its activity and free its admission slot."""
+        with self.activity_lock:
+            self.activity.pop(player, None)
+        if player.admitted:
+            player.admitted = False
+            self.admission.release(player.addr[0])
+
+    def touch(self, player):
+        player.last_seen = time.monotonic()
+        player.pinged = False
+        with self.activity_lock:
+            if player in self.activity:
+                self.activity.move_to_end(player)
+
+    def reap(self):
+        """Ping quiet connections and evict silent ones.
+
+        One timer for the whole server: the activity table is ordered by
+        last message, so a sweep stops at the first connection that is
+        still fresh and only ever walks the idle ones.
+        """
+        now = time.monotonic()
+        ping_after = self.ping_interval or float("inf")
+        evict_after = self.idle_timeout or float("inf")
+        to_ping, to_evict = [], []
+        with self.activity_lock:
+            for player in self.activity:
+                idle = now - player.last_seen
+                if idle < min(ping_after, evict_after):
+                    break
+                if idle >= evict_after:
+                    to_evict.append(player)
+                elif not player.pinged:
+                    player.pinged = True
+                    to_ping.append(player)
+            for player in to_evict:
+                del self.activity[player]
+        for player in to_ping:
+            self.send(player, {"type": "ping", "data": {"t": round(time.time(), 3)}})
+        for player in to_evict:
+            self.counts["evictions"].inc()
+            print(f"[SERVER] Evicting idle connection {player.name or player.addr}")
+            self.close(player)  # the reader side then runs the normal disconnect
+        if self.running:
+            self.call_later(REAP_INTERVAL, self.reap)
+
+    # Rate limiting
+    def allow(self, player):
+        """Take a token for one message; excess messages are dropped, not queued."""
+        if player.bucket is None or player.bucket.take():
+            player.throttled = False
+            return True
+        self.counts["rejected_rate_limit"].inc()
+        if not player.throttled:
+            # One error per burst, so a flood doesn't turn into a reply flood
+            player.throttled = True
+            self.send(player, {"type": "error", "data": {"message": "Rate limit exceeded",
+                                                         "reason": "rate_limit"}})
+        return False
+
+    def send_error(self, player, message):
+        self.counts["errors"].inc()
+        self.send(player, {"type": "error", "data": {"message": message}})
+
+    def send_stats(self, player):
+        self.send(player, {"type": "stats", "data": self.metrics.snapshot()})
+
+    def write_loop(self, player):
+        """Drain one player's outbox; the only place a threaded socket is written."""
+        conn, outbox = player.conn, player.outbox
+        try:
+            while True:
+                batch = [outbox.get()]
+                while batch[-1] is not None and not outbox.empty():
+                    batch.append(outbox.get_nowait())
+                closing = batch[-1] is None
+                if closing:
+                    batch.pop()
+                if batch:
+                    conn.sendall(b"".join(batch))
+                if closing:
+                    break
+        except OSError:
+            pass
+        self.close(player)
+
+    # Transport hooks
+    def send(self, player, obj):
+        self.send_bytes(player, encode_frame(obj, player.proto))
+
+    def send_bytes(self, player, data):
+        """Queue an encoded frame without blocking; None asks the writer to close."""
+        try:
+            player.outbox.put_nowait(data)
+        except queue.Full:
+            print(f"[SERVER] Dropping slow consumer {player.name}")
+            self.close(player)
+
+    def call_later(self, delay, fn):
+        return self.timers.schedule(delay, fn)
+
+    def start_match(self, match):
+        if len(match.players) <= 4:
+            print(f"[SERVER] Match {match.id}: {' vs '.join(p.name for p in match.players)}")
+        else:
+            print(f"[SERVER] Match {match.id}: room of {len(match.players)} players")
+        self.send_players(match)
+        self.maybe_start_round(match)
+
+    def maybe_start_round(self, match):
+        with match.lock:
+            if match.pauses_for():
+                return  # paused until the away player resumes or their seat is given up
+            packet = match.start_round()
+            if packet:
+                if self.move_timeout:
+                    packet["data"]["timeout"] = self.move_timeout
+                    round_index = match.round_index
+                    match.deadline = self.call_later(
+                        self.move_timeout, lambda: self.expire_round(match, round_index))
+                self.broadcast(match.players, packet)
+                # Bots answer on the spot and away seats sit the round out;
+                # a round that starts always has a present human left to move
+                for p in match.players:
+                    if p.is_bot:
+                        match.submit(p, p.choose())
+                    elif p.away:
+                        match.sit_out(p)
+
+    # Bots
+    def wait_for_bot(self, player):
+        """Give a player left alone in the queue a bot opponent after bot_wait seconds."""
+        if self.bots is None:
             return
-        with self.lock:
-            if player.move is not None:
-                send_json(player.conn, {"type": "error", "data": {"message": "Move already submitted"}})
+        self.timers.cancel(player.bot_timer)
+        player.bot_timer = self.call_later(self.bot_wait, lambda: self.add_bots(player))
+
+    def add_bots(self, player):
+        with self.registry_lock:
+            player.bot_timer = None
+            if not player.active or player not in self.registry.waiting:
+                return  # matched with a human meanwhile, or gone
+            match = None
+            while match is None:
+                _, match = self.registry.enqueue(self.bots.take())
+        self.counts["bot_matches"].inc()
+        self.start_match(match)
+
+    def expire_round(self, match, round_index):
+        with match.lock:
+            if match.state != "playing" or match.round_index != round_index:
                 return
-            player.move = move
-            print(f"[SERVER] {player.name} -> {move}")
-            all_submitted = all(p.move for p in self.players if p.active)
-            if all_submitted and len(self.players) == 2:
-                self.evaluate_round()
-
-    def evaluate_round(self):
-        p1, p2 = self.players
-        m1, m2 = p1.move, p2.move
-        result1 = self.determine(m1, m2)
-        # Update scores
-        if result1 == "win":
-            p1.score += 1
-            winner = p1.name
-        elif result1 == "lose":
-            p2.score += 1
-            winner = p2.name
-        else:
-            winner = None
-        result_packet = {
-            "type": "round_result",
-            "data": {
-                "round": self.round_index,
-                "winner": winner,
-                "p1": {"name": p1.name, "move": m1, "score": p1.score},
-                "p2": {"name": p2.name, "move": m2, "score": p2.score},
-                "outcome_p1": result1,
-                "outcome_p2": "tie" if result1 == "tie" else ("win" if result1 == "lose" else "lose")
-            }
-        }
-        self.broadcast(result_packet)
+            print(f"[SERVER] Match {match.id} round {round_index} timed out")
+            self.finish_round(match, match.forfeit())
+
+    def finish_round(self, match, result):
+        self.timers.cancel(match.deadline)
+        match.deadline = None
+        outcomes = result["data"]["outcomes"]
+        self.store.record([(p.name, outcomes[KEYS[p.move]]) for p in match.players])
+        if self.replay is not None:
+            self.replay.record(match.id, match.round_index,
+                               [(p.name, p.move, outcomes[KEYS[p.move]]) for p in match.players])
+        self.broadcast(match.players, result)
         # Start next round after short pause
-        threading.Timer(0.5, self.maybe_start_round).start()
-
-    @staticmethod
-    def determine(a, b):
-        if a == b:
-            return "tie"
-        rules = {"rock": "scissors", "paper": "rock", "scissors": "paper"}
-        return "win" if rules[a] == b else "lose"
-
-    def broadcast(self, obj):
-        dead = []
-        for p in self.players:
-            if not p.active:
-                continue
-            try:
-                send_json(p.conn, obj)
-            except Exception:
-                dead.append(p)
-        for p in dead:
-            self.disconnect(p)
+        self.call_later(ROUND_DELAY, lambda: self.maybe_start_round(match))
 
-    def disconnect(self, player):
-        with self.lock:
-            if not player.active:
+    def register_move(self, player, move):
+        received = time.perf_counter()
+        if move not in MOVES:
+            self.send_error(player, "Invalid move")
+            return
+        match = player.match
+        if match is None:
+            self.send_error(player, "No round in progress")
+            return
+        with match.lock:
+            if match.state != "playing":
+                self.send_error(player, "No round in progress")
                 return
-            player.active = False
+            if player.move is not None:
+                self.send_error(player, "Move already submitted")
+                return
+            if player in match.sat_out:
+                self.send_error(player, "You rejoin at the next round")
+                return
+            self.counts["moves"].inc()
+            log.debug("move player=%s match=%d round=%d move=%s",
+                      player.name, match.id, match.round_index, move)
+            result = match.submit(player, move)
+            if result:
+                self.finish_round(match, result)
+                self.move_latency.observe(time.perf_counter() - received)
+
+    determine = staticmethod(determine)
+
+    def send_players(self, match):
+        """The seat list, to each human with their own seat: names are not unique in a room."""
+        for seat, p in enumerate(match.players):
+            if p.active and not p.is_bot:
+                self.send(p, match.players_packet(seat))
+
+    def broadcast(self, players, obj):
+        frames = {}  # encode once per wire format in use
+        for p in players:
+            if p.is_bot:
+                p.deliver(obj)
+            elif p.active:
+                data = frames.get(p.proto)
+                if data is None:
+                    data = frames[p.proto] = encode_frame(obj, p.proto)
+                self.send_bytes(p, data)
+
+    def close(self, player):
+        """Hard close; the reader thread then sees EOF and disconnects the player."""
+        try:
+            player.outbox.put_nowait(None)  # wake an idle writer
+        except queue.Full:
+            pass
+        try:
+            # shutdown() also wakes the threads blocked in recv()/sendall() on this socket
+            player.conn.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass
         try:
             player.conn.close()
         except:
             pass
+
+    def disconnect(self, player):
+        with self.registry_lock:
+            if not player.active:
+                return
+            player.active = False
+            self.players.discard(player)
+            self.counts["disconnects"].inc()
+            away = self.hold_seat(player)
+            held = player.match.players[:] if away else None
+            if not away:
+                self.sessions.pop(player.token, None)
+                remaining = self.vacate(player)
+        self.timers.cancel(player.bot_timer)
+        self.untrack(player)
+        self.close(player)
+        if away:
+            print(f"[SERVER] {player.name} dropped, seat held for {self.resume_grace:g}s")
+            self.broadcast(held, {"type": "player_away", "data": {
+                "name": player.name, "grace": self.resume_grace}})
+            return
         print(f"[SERVER] {player.name} disconnected")
-        # Inform remaining
-        self.broadcast({"type": "opponent_left", "data": {"message": f"{player.name} left"}})
+        self.requeue(player, remaining)
+
+    def vacate(self, player):
+        """Give up a player's seat; returns the humans who lost their match. Holds registry_lock."""
+        match = player.match
+        if match is None:
+            remaining = self.registry.remove(player)
+        else:
+            with match.lock:
+                if match.continues_without(player):
+                    # A room plays on; seats shift, so everyone gets the new list
+                    result = match.leave(player)
+                    self.send_players(match)
+                    if result:
+                        self.finish_round(match, result)
+                    else:
+                        self.call_later(ROUND_DELAY, lambda: self.maybe_start_round(match))
+                    remaining = []
+                else:
+                    self.timers.cancel(match.deadline)
+                    remaining = self.registry.remove(player)
+        for p in remaining:
+            if p.is_bot:
+                self.bots.release(p)  # bots only play while a human is seated
+        return [p for p in remaining if not p.is_bot]
+
+    def requeue(self, player, remaining):
+        """Inform the players left behind and send them back to the queue."""
+        self.broadcast(remaining, {"type": "opponent_left", "data": {"message": f"{player.name} left"}})
+        for p in remaining:
+            with self.registry_lock:
+                if not p.active:
+                    continue
+                _, match = self.registry.enqueue(p)
+            if match is None:
+                self.wait_for_bot(p)
+            else:
+                self.start_match(match)
+
+    # Session resume
+    def hold_seat(self, player):
+        """Keep a dropped player's seat for resume_grace seconds. Holds registry_lock."""
+        match = player.match
+        if (not self.resume_grace or player.quitting or not self.running
+                or match is None or match.state == "ended"):
+            return False
+        player.away = True
+        player.grace_timer = self.call_later(self.resume_grace, lambda: self.expire_session(player))
+        with match.lock:
+            # A room doesn't wait on them for the round in play either
+            if match.state == "playing" and player.move is None and not match.pauses_for():
+                result = match.sit_out(player)
+                if result:
+                    self.finish_round(match, result)
+        return True
+
+    def expire_session(self, player):
+        with self.registry_lock:
+            if not player.away:
+                return  # resumed meanwhile
+            player.away = False
+            del self.sessions[player.token]
+            self.counts["sessions_expired"].inc()
+            remaining = self.vacate(player)
+        print(f"[SERVER] {player.name} did not come back")
+        self.requeue(player, remaining)
+
+    def take_seat(self, player, old):
+        """Put a resuming connection in the seat `old` held. Holds registry_lock."""
+        self.timers.cancel(old.grace_timer)
+        old.away = False
+        match = old.match
+        if match is None:
+            del self.sessions[old.token]
+            return False  # the match ended while they were away
+        with match.lock:
+            match.players[match.players.index(old)] = player
+            if old in match.sat_out:
+                match.sat_out.remove(old)
+                match.sat_out.add(player)
+            player.match, player.move, player.score = match, old.move, old.score
+            player.name, player.token = old.name, old.token
+            old.match = None
+        self.sessions[player.token] = player
+        return True
+
+    def resumed(self, player, match):
+        """Bring a resumed player up to date: seat, scores, and the round in play."""
+        self.counts["resumes"].inc()
+        print(f"[SERVER] {player.name} resumed match {match.id}")
+        with match.lock:
+            self.send(player, {"type": "join_ack", "data": {
+                "player_index": match.players.index(player), "message": "Resumed", "proto": player.proto,
+                "resume": player.token, "resumed": True, "match": match.id, "round": match.round_index,
+                "scores": [p.score for p in match.players]}})
+            self.send(player, match.players_packet(match.players.index(player)))
+            others = [p for p in match.players if p is not player]
+            self.broadcast(others, {"type": "player_back", "data": {"name": player.name}})
+            playing = match.state == "playing" and player.move is None and player not in match.sat_out
+            if playing:
+                data = {"round": match.round_index, "match": match.id,
+                        "message": f"Round {match.round_index} - choose your move"}
+                if match.deadline is not None:
+                    data["timeout"] = round(self.timers.remaining(match.deadline), 3)
+                self.send(player, {"type": "start_round", "data": data})
+        if match.state == "ready":
+            self.maybe_start_round(match)
 
     def shutdown(self):
         self.running = False
@@ -212,14 +644,204 @@ class RpsServer:
             self.sock.close()
         except:
             pass
-        for p in self.players:
-            try:
-                p.conn.close()
-            except:
-                pass
+        try:
+            for p in list(self.players):
+                self.close(p)
+        finally:
+            # Scores and replay records still queued must reach the disk whatever happened above
+            self.store.close()
+            if self.replay is not None:
+                self.replay.close()
         print("[SERVER] Closed.")
 
+# Asyncio engine ---------------------------------------------------
+class RpsProtocol(asyncio.Protocol):
+    """One connection in the asyncio engine: no thread, no task, just callbacks."""
+    def __init__(self, server):
+        self.server = server
+        self.transport = None
+        self.player = None
+        self.reader = FrameReader()
+        self.joined = False
+
+    def connection_made(self, transport):
+        self.transport = transport
+        addr = transport.get_extra_info("peername")
+        reason = self.server.admission.admit(addr[0])
+        if reason:
+            self.server.counts[f"rejected_{reason}"].inc()
+            transport.write(REJECTIONS[reason])
+            transport.close()
+            return
+        self.player = self.server.new_player(transport, addr)
+        self.server.counts["connections"].inc()
+        print(f"[SERVER] Connection from {self.player.addr}")
+        self.server.track(self.player)
+
+    def data_received(self, data):
+        if self.player is None:
+            return
+        self.server.touch(self.player)
+        try:
+            for msg in self.reader.feed(data):
+                if not self.joined:
+                    if not self.server.handle_join(self.player, msg):
+                        break
+                    self.joined = True
+                elif msg is None:
+                    break
+                elif self.server.allow(self.player) and not self.server.handle_message(self.player, msg):
+                    break
+            else:
+                return
+        except FrameTooLarge:
+            pass
+        except Exception as e:
+            self.server.counts["errors"].inc()
+            print(f"[SERVER] Error with {self.player.name}: {e}")
+        self.transport.close()
+
+    def connection_lost(self, exc):
+        if self.player is None:
+            return  # refused in connection_made
+        if self.joined or self.player in self.server.players:
+            self.server.disconnect(self.player)
+        else:
+            self.server.untrack(self.player)
+
+class AsyncRpsServer(RpsServer):
+    """Same protocol and game rules as RpsServer, run on a single event loop.
+
+    Every callback runs on the loop thread, so the locks are no-ops and
+    writes go straight into the transport buffer instead of blocking.
+    """
+    def __init__(self, *args, **kwargs):
+        # An idle connection costs no thread here, so by default there is no global cap
+        kwargs.setdefault("max_connections", 0)
+        super().__init__(*args, **kwargs)
+        self.registry_lock = contextlib.nullcontext()
+        self.activity_lock = contextlib.nullcontext()
+        self.registry.lock = contextlib.nullcontext
+        self.loop = None
+        self.server = None
+
+    def start(self):
+        try:
+            asyncio.run(self.serve())
+        except KeyboardInterrupt:
+            print("\n[SERVER] Shutting down...")
+        finally:
+            self.shutdown()
+
+    async def serve(self):
+        self.loop = asyncio.get_running_loop()
+        self.server = await self.loop.create_server(
+            lambda: RpsProtocol(self), self.host, self.port, reuse_address=True,
+            reuse_port=self.reuse_port or None, backlog=self.backlog)
+        print(f"[SERVER] Listening on {self.host}:{self.port} (asyncio)")
+        self.timer_task = self.loop.create_task(self.run_timers())
+        async with self.server:
+            try:
+                await self.server.serve_forever()
+            finally:
+                # Close connections while the loop still runs: by the time asyncio.run
+                # returns and shutdown() is called, the loop is closed
+                self.running = False
+                for player in list(self.activity):
+                    player.conn.close()
+
+    def send_bytes(self, player, data):
+        transport = player.conn
+        if transport.is_closing():
+            return
+        if transport.get_write_buffer_size() > SEND_BUFFER_MAX:
+            print(f"[SERVER] Dropping slow consumer {player.name}")
+            transport.abort()
+            return
+        transport.write(data)
+
+    async def run_timers(self):
+        while self.running:
+            await asyncio.sleep(self.timers.tick)
+            self.timers.advance()
+
+    def close(self, player):
+        if self.loop is None or not self.loop.is_closed():
+            player.conn.close()
+
+    def shutdown(self):
+        if self.server is not None:
+            self.server.close()
+        super().shutdown()
+
+def server_options(args):
+    """Constructor keywords shared by the single-process and worker entry points."""
+    options = {"ping_interval": args.ping_interval, "idle_timeout": args.idle_timeout,
+               "backlog": args.backlog, "max_per_ip": args.max_per_ip,
+               "msg_rate": args.msg_rate, "msg_burst": args.msg_burst,
+               "bot_wait": args.bot_wait, "bots": args.bots.split(","), "room_size": args.room_size,
+               "resume_grace": args.resume_grace}
+    if args.max_connections is not None:
+        options["max_connections"] = args.max_connections  # else the engine's own default
+    return options
+
 if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description="Rock-Paper-Scissors Server")
+    ap.add_argument("--host", default=HOST)
+    ap.add_argument("--port", type=int, default=PORT)
+    ap.add_argument("--mode", choices=("thread", "async"), default="thread",
+                    help="thread: one thread per connection; async: single asyncio event loop")
+    ap.add_argument("--move-timeout", type=float, default=MOVE_TIMEOUT,
+                    help="seconds a player has to move before forfeiting the round (0 = no limit)")
+    ap.add_argument("--ping-interval", type=float, default=PING_INTERVAL,
+                    help="ping connections quiet for this many seconds (0 = never)")
+    ap.add_argument("--idle-timeout", type=float, default=IDLE_TIMEOUT,
+                    help="drop connections silent for this many seconds (0 = never)")
+    ap.add_argument("--backlog", type=int, default=BACKLOG, help="listen() backlog")
+    ap.add_argument("--max-connections", type=int, default=None,
+                    help=f"open connections per process before new ones are refused "
+                         f"(0 = no cap; default {MAX_CONNECTIONS} in thread mode, no cap in async mode)")
+    ap.add_argument("--max-per-ip", type=int, default=MAX_PER_IP,
+                    help="open connections per client address (0 = no cap; load tests from one host need this)")
+    ap.add_argument("--msg-rate", type=float, default=MSG_RATE,
+                    help="messages per second each connection may send, excess is dropped (0 = no limit)")
+    ap.add_argument("--msg-burst", type=int, default=MSG_BURST, help="messages allowed back to back")
+    ap.add_argument("--room-size", type=int, default=MATCH_SIZE,
+                    help=f"players per match, 2 to {MAX_ROOM}; every player scores against the whole room")
+    ap.add_argument("--bot-wait", type=float, default=BOT_WAIT,
+                    help="seconds a lone player waits before a server bot joins the match (0 = no bots)")
+    ap.add_argument("--bots", default=",".join(STRATEGIES),
+                    help=f"comma-separated bot strategies to rotate through ({', '.join(STRATEGIES)})")
+    ap.add_argument("--resume-grace", type=float, default=RESUME_GRACE,
+                    help="seconds a dropped player's seat and score are held for a reconnect (0 = never)")
+    ap.add_argument("--metrics-port", type=int, default=0,
+                    help="serve the stats snapshot as JSON over HTTP on 127.0.0.1:PORT")
+    ap.add_argument("--verbose", action="store_true", help="log every move (structured debug log)")
+    ap.add_argument("--store", metavar="DIR",
+                    help="keep player stats and the leaderboard on disk in DIR (default: memory only)")
+    ap.add_argument("--replay", metavar="DIR",
+                    help="append every round to a binary replay log in DIR (query it with gamereplay.py)")
+    ap.add_argument("--workers", type=int, default=1,
+                    help="run N worker processes sharing the port via SO_REUSEPORT")
+    args = ap.parse_args()
+    if not 2 <= args.room_size <= MAX_ROOM:
+        ap.error(f"--room-size must be between 2 and {MAX_ROOM}")
+    if args.workers > 1 and args.store:
+        # Each process would keep its own table: a player's stats split across
+        # workers and a leaderboard request sees only one worker's players
+        ap.error("--store keeps one leaderboard per process and cannot be combined with --workers")
+    logging.basicConfig(level=logging.DEBUG if args.verbose else logging.INFO,
+                        format="%(asctime)s %(levelname)s %(name)s %(message)s")
     print("Rock-Paper-Scissors Server")
-    print(f"Listening on {HOST}:{PORT}")
-    RpsServer().start()
+    print(f"Listening on {args.host}:{args.port}")
+    if args.workers > 1:
+        from gameworkers import Supervisor
+        Supervisor(args).run()
+        sys.exit(0)
+    server_cls = AsyncRpsServer if args.mode == "async" else RpsServer
+    server = server_cls(args.host, args.port, args.move_timeout, store_path=args.store, replay_path=args.replay,
+                        **server_options(args))
+    if args.metrics_port:
+        serve_http(server.metrics, "127.0.0.1", args.metrics_port)
+        print(f"[SERVER] Metrics on http://127.0.0.1:{args.metrics_port}/")
+    server.start()
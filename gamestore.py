@@ -0,0 +1,221 @@
+"""Persistent player stats and the leaderboard.
+
+Round outcomes go to an append-only log (rounds.log, one JSON line per
+round) and are periodically compacted into a snapshot (scores.json).
+The game path only enqueues; a writer thread applies batches to the
+in-memory table, appends them to the log and keeps the leaderboard
+ordered as it goes.
+"""
+import bisect, json, os, queue, threading, time
+
+FLUSH_INTERVAL = 0.2      # seconds between batched log writes
+SNAPSHOT_EVERY = 10000    # compact the log after this many records
+LEADERBOARD_SIZE = 10
+LEADERBOARD_MAX = 100     # most entries one leaderboard request may ask for
+OPPOSITE = {"win": "lose", "lose": "win", "tie": "tie"}  # for two-player log records from before rooms
+BLOCK = 512               # leaderboard keys per block; a block is split at twice this
+
+class PlayerStats:
+    __slots__ = ("wins", "losses", "ties")
+
+    def __init__(self, wins=0, losses=0, ties=0):
+        self.wins, self.losses, self.ties = wins, losses, ties
+
+    def key(self, name):
+        return (-self.wins, self.losses, name)
+
+    def to_dict(self, name):
+        return {"name": name, "wins": self.wins, "losses": self.losses, "ties": self.ties}
+
+class Leaderboard:
+    """Every player kept sorted by (wins desc, losses asc, name).
+
+    Keys live in sorted blocks of at most 2 * BLOCK entries, with the last
+    key of each block in `maxes`. An update finds the block by a binary
+    search over `maxes` and moves one entry inside it, so it shifts
+    O(BLOCK) entries instead of O(players). Reading the top K walks the
+    first blocks and never sorts.
+    """
+    def __init__(self):
+        self.blocks = []
+        self.maxes = []
+        self.size = 0
+
+    def __len__(self):
+        return self.size
+
+    def update(self, old_key, new_key):
+        if old_key is not None:
+            self.remove(old_key)
+        self.insert(new_key)
+
+    def insert(self, key):
+        if not self.blocks:
+            self.blocks.append([key])
+            self.maxes.append(key)
+        else:
+            b = bisect.bisect_left(self.maxes, key)
+            if b == len(self.maxes):
+                b -= 1  # past every block: append to the last one
+                self.blocks[b].append(key)
+                self.maxes[b] = key
+            else:
+                bisect.insort(self.blocks[b], key)
+            block = self.blocks[b]
+            if len(block) > 2 * BLOCK:
+                self.blocks[b:b + 1] = [block[:BLOCK], block[BLOCK:]]
+                self.maxes[b:b + 1] = [block[BLOCK - 1], block[-1]]
+        self.size += 1
+
+    def remove(self, key):
+        b = bisect.bisect_left(self.maxes, key)
+        if b == len(self.maxes):
+            return
+        block = self.blocks[b]
+        i = bisect.bisect_left(block, key)
+        if i == len(block) or block[i] != key:
+            return
+        del block[i]
+        self.size -= 1
+        if not block:
+            del self.blocks[b]
+            del self.maxes[b]
+        elif i == len(block):
+            self.maxes[b] = block[-1]
+
+    def top(self, k):
+        out = []
+        for block in self.blocks:
+            if len(out) >= k:
+                break
+            out.extend(key[2] for key in block[:k - len(out)])
+        return out
+
+class ScoreStore:
+    def __init__(self, path=None):
+        """`path` is a directory for the log and snapshot; None keeps it in memory."""
+        self.path = path
+        self.players = {}   # name -> PlayerStats
+        self.board = Leaderboard()
+        self.seq = 0        # last applied record
+        self.snapshot_seq = 0
+        self.pending = queue.SimpleQueue()
+        self.lock = threading.Lock()   # guards players/board against readers
+        self.log = None
+        self.closed = threading.Event()
+        if path:
+            os.makedirs(path, exist_ok=True)
+            self.load()
+            self.log = open(os.path.join(path, "rounds.log"), "a", encoding="utf-8")
+        self.writer = threading.Thread(target=self.write_loop, daemon=True)
+        self.writer.start()
+
+    # Game path: never touches the disk
+    def record(self, results):
+        """`results` is one (name, outcome) pair per seat of a finished round."""
+        self.pending.put((time.time(), results))
+
+    def leaderboard(self, k=LEADERBOARD_SIZE):
+        with self.lock:
+            return [self.players[name].to_dict(name) for name in self.board.top(k)]
+
+    # Writer side
+    def apply(self, results):
+        for name, outcome in results:
+            stats = self.players.get(name)
+            old_key = None
+            if stats is None:
+                stats = self.players[name] = PlayerStats()
+            else:
+                old_key = stats.key(name)
+            if outcome == "win":
+                stats.wins += 1
+            elif outcome == "lose":
+                stats.losses += 1
+            else:
+                stats.ties += 1
+            self.board.update(old_key, stats.key(name))
+
+    def write_loop(self):
+        while True:
+            closed = self.closed.wait(FLUSH_INTERVAL)
+            try:
+                self.flush()
+            except Exception as e:
+                # Drop the batch, keep the writer: without it the queue only grows
+                print(f"[STORE] Flush failed, batch dropped: {e}")
+            if closed:
+                break
+
+    def flush(self):
+        batch = []
+        try:
+            while True:
+                batch.append(self.pending.get_nowait())
+        except queue.Empty:
+            pass
+        if not batch:
+            return
+        lines = []
+        with self.lock:
+            for ts, results in batch:
+                if not all(isinstance(name, str) for name, _ in results):
+                    # Names are compared in the leaderboard: one None would break every insert
+                    print(f"[STORE] Skipped a round with an invalid player name: {results!r}")
+                    continue
+                self.seq += 1
+                self.apply(results)
+                lines.append(json.dumps({"s": self.seq, "t": round(ts, 3), "r": results}, separators=(",", ":")))
+        if self.log is not None:
+            self.log.write("\n".join(lines) + "\n")
+            self.log.flush()
+            if self.seq - self.snapshot_seq >= SNAPSHOT_EVERY:
+                self.snapshot()
+
+    def snapshot(self):
+        """Write every player's totals atomically, then start a fresh log."""
+        with self.lock:
+            data = {"seq": self.seq,
+                    "players": {n: [s.wins, s.losses, s.ties] for n, s in self.players.items()}}
+        tmp = os.path.join(self.path, "scores.json.tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(data, f, separators=(",", ":"))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, os.path.join(self.path, "scores.json"))
+        # Records up to data["seq"] are in the snapshot; replay skips them if truncation is lost
+        self.log.truncate(0)
+        self.snapshot_seq = data["seq"]
+
+    def load(self):
+        snap = os.path.join(self.path, "scores.json")
+        if os.path.exists(snap):
+            with open(snap, encoding="utf-8") as f:
+                data = json.load(f)
+            for name, (wins, losses, ties) in data["players"].items():
+                stats = self.players[name] = PlayerStats(wins, losses, ties)
+                self.board.update(None, stats.key(name))
+            self.seq = self.snapshot_seq = data["seq"]
+        log = os.path.join(self.path, "rounds.log")
+        if os.path.exists(log):
+            with open(log, encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        rec = json.loads(line)
+                    except ValueError:
+                        continue  # torn last line after a crash
+                    if rec["s"] > self.seq:
+                        self.seq = rec["s"]
+                        if "r" in rec:
+                            self.apply(rec["r"])
+                        else:
+                            (name1, name2), outcome1 = rec["p"], rec["o"]
+                            self.apply([(name1, outcome1), (name2, OPPOSITE[outcome1])])
+
+    def close(self):
+        self.closed.set()
+        self.writer.join(2)
+        if self.log is not None:
+            self.snapshot()
+            self.log.close()
+            self.log = None
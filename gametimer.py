@@ -0,0 +1,81 @@
+import math, threading, time
+
+TICK = 0.01    # seconds per wheel slot
+SLOTS = 4096   # one lap of the wheel is ~41s at the default tick
+
+class Timer:
+    __slots__ = ("deadline", "fn", "slot")
+
+    def __init__(self, deadline, fn, slot):
+        self.deadline = deadline  # absolute tick number
+        self.fn = fn
+        self.slot = slot
+
+# Hashed timer wheel ----------------------------------------------
+class TimerWheel:
+    """One scheduler for every delay in the server.
+
+    Timers hash into a fixed ring of slots by deadline tick, so schedule
+    and cancel are O(1) set operations no matter how many are pending.
+    Nothing runs on its own: the owner calls advance() from a single
+    ticker (thread or event loop task) and due callbacks run there.
+    """
+    def __init__(self, tick=TICK, slots=SLOTS):
+        self.tick = tick
+        self.slots = [set() for _ in range(slots)]
+        self.lock = threading.Lock()
+        self.origin = time.monotonic()
+        self.current = 0  # last tick processed
+        self.pending = 0
+
+    def schedule(self, delay, fn):
+        now = int((time.monotonic() - self.origin) / self.tick)
+        with self.lock:
+            deadline = max(now, self.current) + max(1, math.ceil(delay / self.tick))
+            timer = Timer(deadline, fn, self.slots[deadline % len(self.slots)])
+            timer.slot.add(timer)
+            self.pending += 1
+        return timer
+
+    def cancel(self, timer):
+        if timer is None:
+            return
+        with self.lock:
+            if timer in timer.slot:
+                timer.slot.discard(timer)
+                self.pending -= 1
+
+    def remaining(self, timer):
+        """Seconds until `timer` is due."""
+        return max(0.0, self.origin + timer.deadline * self.tick - time.monotonic())
+
+    def advance(self, now=None):
+        """Run every timer that has come due by `now` (monotonic seconds)."""
+        if now is None:
+            now = time.monotonic()
+        target = int((now - self.origin) / self.tick)
+        due = []
+        with self.lock:
+            # After a long stall one lap visits every slot; no need to spin more
+            first = max(self.current + 1, target - len(self.slots) + 1)
+            for t in range(first, target + 1):
+                slot = self.slots[t % len(self.slots)]
+                if slot:
+                    ready = [timer for timer in slot if timer.deadline <= target]
+                    slot.difference_update(ready)
+                    due.extend(ready)
+            self.current = max(self.current, target)
+            self.pending -= len(due)
+        due.sort(key=lambda timer: timer.deadline)
+        for timer in due:
+            try:
+                timer.fn()
+            except Exception as e:
+                print(f"[TIMER] Callback failed: {e}")
+        return len(due)
+
+    def run(self, running):
+        """Ticker loop for threaded callers; stops once running() is false."""
+        while running():
+            time.sleep(self.tick)
+            self.advance()
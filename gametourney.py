@@ -0,0 +1,259 @@
+"""Offline tournaments between the bot strategies, vectorized with NumPy.
+
+Moves are int8 codes (the MOVE_CODES order of gameproto) and outcomes
+come from a 3x3 table built once from gamematch.determine. Every series
+of a tournament round is played side by side: each strategy keeps its
+state as arrays over all the seats it holds, so one Python step moves
+thousands of series forward by one round, and the outcomes of a whole
+chunk of rounds are resolved with a single table lookup.
+
+    python gametourney.py round-robin --rounds 1000 --games 2000
+    python gametourney.py swiss --entrants 64 --swiss-rounds 6
+"""
+import argparse, itertools, json, time
+import numpy as np
+from gamematch import MOVES, determine
+from gameproto import OUTCOME_CODES
+
+CHUNK_ROUNDS = 256   # rounds of move history kept before outcomes are resolved
+
+# OUTCOME[a, b]: 0 tie, 1 a wins, 2 b wins (OUTCOMES order: tie, win, lose)
+OUTCOME = np.array([[OUTCOME_CODES[determine(a, b)] for b in MOVES] for a in MOVES], dtype=np.int8)
+
+def counter_top(c0, c1, c2):
+    """Counter to the most counted move per seat (first on ties), and that count.
+
+    Three columns instead of argmax(axis=1): argmax over a length-3 axis
+    is several times slower than a few whole-array comparisons.
+    """
+    moves = (c1 > c0).view(np.int8) + np.int8(1)   # paper beats rock, scissors beats paper
+    best = np.maximum(c0, c1)
+    scissors = c2 > best
+    moves[scissors] = 0                             # rock beats scissors
+    return moves, np.maximum(best, c2, out=best)
+
+# Batched strategies ------------------------------------------------
+# Same names and rules as gamebots, one instance per strategy holding
+# `n` independent seats.
+class RandomBatch:
+    name = "random"
+
+    def __init__(self, n, rng):
+        self.n, self.rng = n, rng
+        self.noise = np.empty((0, n), np.int8)
+        self.used = 0
+
+    def random_moves(self):
+        """One random move per seat, drawn a chunk of rounds at a time."""
+        if self.used == len(self.noise):
+            self.noise = self.rng.integers(0, 3, (CHUNK_ROUNDS, self.n), dtype=np.int8)
+            self.used = 0
+        self.used += 1
+        return self.noise[self.used - 1]
+
+    def choose(self, t):
+        return self.random_moves()
+
+    def observe(self, opp):
+        pass
+
+class RockBatch(RandomBatch):
+    name = "rock"
+
+    def choose(self, t):
+        return np.zeros(self.n, np.int8)
+
+class CycleBatch(RandomBatch):
+    name = "cycle"
+
+    def choose(self, t):
+        return np.full(self.n, t % 3, np.int8)
+
+class FrequencyBatch(RandomBatch):
+    name = "frequency"
+
+    def __init__(self, n, rng):
+        super().__init__(n, rng)
+        self.rows = np.arange(n)
+        self.counts = np.zeros((3, n), np.int32)   # [move, seat]; rows contiguous per move
+
+    def choose(self, t):
+        if t == 0:
+            return self.random_moves()  # nothing observed yet
+        return counter_top(*self.counts)[0]
+
+    def observe(self, opp):
+        self.counts.reshape(-1)[opp.astype(np.intp) * self.n + self.rows] += 1
+
+class MarkovBatch(RandomBatch):
+    name = "markov"
+
+    def __init__(self, n, rng):
+        super().__init__(n, rng)
+        self.rows = np.arange(n)
+        self.table = np.zeros(9 * n, np.int32)   # flat [previous, next, seat] counts
+        self.base = self.rows.copy()              # offset of row `last` for each seat
+        self.started = False
+
+    def choose(self, t):
+        flat, base, n = self.table, self.base, self.n
+        moves, seen = counter_top(flat[base], flat[base + n], flat[base + 2 * n])
+        fresh = seen == 0
+        if fresh.any():
+            moves = np.where(fresh, self.random_moves(), moves)
+        return moves
+
+    def observe(self, opp):
+        offset = opp.astype(np.intp) * self.n
+        if self.started:
+            self.table[self.base + offset] += 1
+        self.started = True
+        self.base = offset * 3 + self.rows
+
+STRATEGIES = {s.name: s for s in (RandomBatch, FrequencyBatch, MarkovBatch, RockBatch, CycleBatch)}
+
+# Engine ------------------------------------------------------------
+def play_series(pairs, rounds, rng):
+    """Play `rounds` rounds of every (strategy_a, strategy_b) pair at once.
+
+    Returns an int64 array of shape (len(pairs), 3): rounds won by a,
+    rounds won by b, ties. Seat 2*i is side a of series i, 2*i+1 side b.
+    """
+    seats = np.array([name for pair in pairs for name in pair])
+    # Seats are laid out grouped by strategy so each strategy owns a slice
+    order = np.argsort(seats, kind="stable")
+    position = np.empty_like(order)
+    position[order] = np.arange(len(order))
+    partner = position[order ^ 1]
+    groups = []
+    for name in np.unique(seats):
+        lo, hi = np.searchsorted(seats[order], name, "left"), np.searchsorted(seats[order], name, "right")
+        groups.append((slice(lo, hi), STRATEGIES[name](int(hi - lo), rng)))
+    series = len(pairs)
+    offsets = 3 * np.arange(series)
+    totals = np.zeros(3 * series, np.int64)
+    history = np.empty((min(rounds, CHUNK_ROUNDS), len(seats)), np.int8)
+    for start in range(0, rounds, CHUNK_ROUNDS):
+        chunk = history[:min(CHUNK_ROUNDS, rounds - start)]
+        for t, moves in enumerate(chunk, start):
+            for seat, strategy in groups:
+                moves[seat] = strategy.choose(t)
+            opp = moves[partner]
+            for seat, strategy in groups:
+                strategy.observe(opp[seat])
+        outcome = OUTCOME[chunk[:, position[0::2]], chunk[:, position[1::2]]]   # (rounds in chunk, series)
+        totals += np.bincount((outcome + offsets).ravel(), minlength=3 * series)
+    ties, a_wins, b_wins = totals.reshape(series, 3).T
+    return np.stack([a_wins, b_wins, ties], 1)
+
+class Standing:
+    def __init__(self, name, strategy):
+        self.name = name
+        self.strategy = strategy
+        self.points = 0.0        # series: win 1, draw 0.5, bye 1
+        self.series = [0, 0, 0]  # won, drawn, lost
+        self.rounds = [0, 0, 0]  # won, tied, lost
+        self.opponents = set()
+
+    def add(self, won, lost, tied, opponent=None):
+        self.rounds[0] += int(won)
+        self.rounds[1] += int(tied)
+        self.rounds[2] += int(lost)
+        k = 0 if won > lost else (2 if won < lost else 1)
+        self.series[k] += 1
+        self.points += (1.0, 0.5, 0.0)[k]
+        if opponent is not None:
+            self.opponents.add(opponent)
+
+    def to_dict(self):
+        played = sum(self.rounds)
+        return {"name": self.name, "strategy": self.strategy, "points": self.points,
+                "series": dict(zip(("won", "drawn", "lost"), self.series)),
+                "rounds": dict(zip(("won", "tied", "lost"), self.rounds)),
+                "round_win_rate": round(self.rounds[0] / played, 4) if played else None}
+
+def settle(table, pairs, results):
+    for (a, b), (a_wins, b_wins, ties) in zip(pairs, results):
+        table[a].add(a_wins, b_wins, ties, b)
+        table[b].add(b_wins, a_wins, ties, a)
+
+def round_robin(strategies, rounds, games, rng):
+    """Every strategy against every other, `games` independent series per pairing."""
+    table = {name: Standing(name, name) for name in strategies}
+    pairs = [pair for pair in itertools.combinations(strategies, 2) for _ in range(games)]
+    results = play_series(pairs, rounds, rng)
+    settle(table, pairs, results)
+    return table, len(pairs) * rounds
+
+def swiss(strategies, entrants, swiss_rounds, rounds, rng):
+    """`entrants` seats cycling through the strategies; pairs by score, no rematches."""
+    names = [f"{s}-{i}" for i, s in zip(range(entrants), itertools.cycle(strategies))]
+    table = {name: Standing(name, name.rsplit("-", 1)[0]) for name in names}
+    played = 0
+    for _ in range(swiss_rounds):
+        order = sorted(names, key=lambda n: (-table[n].points, rng.random()))
+        pairs = []
+        while len(order) > 1:
+            a = order.pop(0)
+            # Nearest entrant on the same score band not met yet, else the nearest one
+            j = next((k for k, b in enumerate(order) if b not in table[a].opponents), 0)
+            pairs.append((a, order.pop(j)))
+        if order:
+            table[order[0]].points += 1.0  # bye
+        results = play_series([(table[a].strategy, table[b].strategy) for a, b in pairs], rounds, rng)
+        settle(table, pairs, results)
+        played += len(pairs) * rounds
+    return table, played
+
+def strategy_stats(table):
+    stats = {}
+    for row in table.values():
+        s = stats.setdefault(row.strategy, Standing(row.strategy, row.strategy))
+        s.points += row.points
+        s.series = [x + y for x, y in zip(s.series, row.series)]
+        s.rounds = [x + y for x, y in zip(s.rounds, row.rounds)]
+    return sorted(stats.values(), key=lambda s: -s.rounds[0] / max(1, sum(s.rounds)))
+
+def print_standings(table):
+    rows = sorted(table.values(), key=lambda r: (-r.points, -r.rounds[0], r.name))
+    print(f"{'#':>3} {'entrant':<16} {'pts':>7} {'W-D-L':>13} {'round win%':>10}")
+    for i, r in enumerate(rows, 1):
+        played = sum(r.rounds)
+        print(f"{i:>3} {r.name:<16} {r.points:>7.1f} {'-'.join(map(str, r.series)):>13} "
+              f"{100 * r.rounds[0] / played if played else 0:>9.2f}%")
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description="Vectorized RPS bot tournament")
+    ap.add_argument("format", choices=("round-robin", "swiss"))
+    ap.add_argument("--strategies", default=",".join(STRATEGIES),
+                    help=f"comma-separated, from {', '.join(STRATEGIES)}")
+    ap.add_argument("--rounds", type=int, default=1000, help="RPS rounds per series")
+    ap.add_argument("--games", type=int, default=1000, help="round-robin: series per pairing")
+    ap.add_argument("--entrants", type=int, default=64, help="swiss: number of entrants")
+    ap.add_argument("--swiss-rounds", type=int, default=6)
+    ap.add_argument("--seed", type=int, default=None)
+    ap.add_argument("--out", help="write standings as JSON to this file")
+    args = ap.parse_args()
+    strategies = args.strategies.split(",")
+    unknown = [s for s in strategies if s not in STRATEGIES]
+    if unknown:
+        ap.error(f"unknown strategy: {', '.join(unknown)}")
+    rng = np.random.default_rng(args.seed)
+    t = time.perf_counter()
+    if args.format == "round-robin":
+        table, played = round_robin(strategies, args.rounds, args.games, rng)
+    else:
+        table, played = swiss(strategies, args.entrants, args.swiss_rounds, args.rounds, rng)
+    elapsed = time.perf_counter() - t
+    print_standings(table)
+    print()
+    print(f"{'strategy':<16} {'W-D-L':>13} {'round win%':>10}")
+    for s in strategy_stats(table):
+        print(f"{s.name:<16} {'-'.join(map(str, s.series)):>13} {100 * s.rounds[0] / max(1, sum(s.rounds)):>9.2f}%")
+    print(f"\n{played:,} rounds in {elapsed:.2f}s ({played / elapsed:,.0f} rounds/s)")
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump({"format": args.format, "rounds": played, "elapsed_s": round(elapsed, 3),
+                       "standings": [r.to_dict() for r in sorted(table.values(), key=lambda r: -r.points)],
+                       "strategies": [s.to_dict() for s in strategy_stats(table)]}, f, indent=2)
+        print(f"saved {args.out}")
@@ -0,0 +1,113 @@
+"""Multi-process RpsServer: N workers share one port through SO_REUSEPORT.
+
+The kernel spreads new connections across the workers and each worker
+runs its own independent matches, so the GIL no longer caps the server
+at one core. The supervisor restarts workers that die and merges their
+metrics into one snapshot.
+"""
+import logging, multiprocessing, os, queue, signal, socket, sys, threading, time
+from gameserver import RpsServer, AsyncRpsServer, server_options
+from gamemetrics import combine_exports, merge_exports, serve_http
+
+STATS_INTERVAL = 1.0   # seconds between metric reports from each worker
+RESTART_DELAY = 1.0    # minimum seconds between two starts of one worker slot
+
+def run_worker(index, args, stats_queue):
+    logging.basicConfig(level=logging.DEBUG if args.verbose else logging.INFO,
+                        format=f"%(asctime)s %(levelname)s worker{index} %(name)s %(message)s")
+    server_cls = AsyncRpsServer if args.mode == "async" else RpsServer
+    # Each worker owns its replay log, so records never interleave across processes.
+    # --store is refused with --workers: leaderboards are per process.
+    replay = os.path.join(args.replay, f"worker{index}") if args.replay else None
+    server = server_cls(args.host, args.port, args.move_timeout, reuse_port=True, replay_path=replay,
+                        **server_options(args))
+    # Interleave match ids so they stay unique across workers, and above this
+    # slot's replay log so a respawned worker doesn't reuse them either
+    server.registry.number_after(server.replay.last_match if server.replay else 0, index + 1, args.workers)
+
+    parent = os.getppid()
+
+    def report():
+        while os.getppid() == parent:
+            time.sleep(STATS_INTERVAL)
+            stats_queue.put((index, server.metrics.export()))
+        os._exit(0)  # supervisor is gone; don't linger as an orphan
+
+    threading.Thread(target=report, daemon=True).start()
+    signal.signal(signal.SIGTERM, lambda *_: sys.exit(0))  # so shutdown() flushes the store
+    server.start()
+
+class Supervisor:
+    def __init__(self, args):
+        self.args = args
+        self.ctx = multiprocessing.get_context("spawn")
+        self.stats_queue = self.ctx.Queue()
+        self.procs = [None] * args.workers
+        self.started_at = [0.0] * args.workers
+        self.restarts = [0] * args.workers
+        self.latest = {}   # worker index -> last Metrics.export()
+        self.retired = None  # final exports of dead workers added into one, so totals survive restarts
+        self.lock = threading.Lock()
+
+    def spawn(self, index):
+        proc = self.ctx.Process(target=run_worker, args=(index, self.args, self.stats_queue),
+                                name=f"rps-worker-{index}", daemon=True)
+        proc.start()
+        self.procs[index] = proc
+        self.started_at[index] = time.monotonic()
+        print(f"[SUPERVISOR] Worker {index} started (pid {proc.pid})")
+
+    def run(self):
+        if not hasattr(socket, "SO_REUSEPORT"):
+            print("[SUPERVISOR] SO_REUSEPORT is not available on this platform")
+            return
+        signal.signal(signal.SIGTERM, lambda *_: sys.exit(0))
+        for i in range(len(self.procs)):
+            self.spawn(i)
+        if self.args.metrics_port:
+            serve_http(self, "127.0.0.1", self.args.metrics_port)
+            print(f"[SUPERVISOR] Metrics on http://127.0.0.1:{self.args.metrics_port}/")
+        try:
+            while True:
+                self.collect(0.5)
+                self.check_workers()
+        except KeyboardInterrupt:
+            print("\n[SUPERVISOR] Shutting down...")
+        finally:
+            for proc in self.procs:
+                proc.terminate()
+            for proc in self.procs:
+                proc.join(2)
+
+    def collect(self, timeout):
+        try:
+            index, raw = self.stats_queue.get(timeout=timeout)
+            while True:
+                with self.lock:
+                    self.latest[index] = raw
+                index, raw = self.stats_queue.get_nowait()
+        except queue.Empty:
+            pass
+
+    def check_workers(self):
+        for i, proc in enumerate(self.procs):
+            if proc.is_alive() or time.monotonic() - self.started_at[i] < RESTART_DELAY:
+                continue
+            print(f"[SUPERVISOR] Worker {i} (pid {proc.pid}) exited with code {proc.exitcode}, restarting")
+            with self.lock:
+                raw = self.latest.pop(i, None)
+                if raw is not None:
+                    raw["gauges"] = {}  # a dead worker holds no players
+                    # Folded in right away: a crash-looping worker must not grow this
+                    self.retired = combine_exports([raw] + ([self.retired] if self.retired else []))
+            self.restarts[i] += 1
+            self.spawn(i)
+
+    def snapshot(self):
+        with self.lock:
+            snap = merge_exports(([self.retired] if self.retired else []) + list(self.latest.values()))
+        snap["workers"] = [
+            {"index": i, "pid": p.pid, "alive": p.is_alive(), "restarts": self.restarts[i]}
+            for i, p in enumerate(self.procs)
+        ]
+        return snap